@@ -0,0 +1,105 @@
+"""
+Build / refresh the daily loan-book roll-up that the dashboard reads when LOAN_BOOK_ROLLUP_TABLE is set.
+One row per closed day (before CURRENT_DATE) with the pre-aggregated sums behind the Loan book section that no longer
+change once the day has closed (plan value and the Operations tables), so the dashboard sums a few hundred rows instead
+of scanning INSTALMENT_PLAN and the Operations tables; it adds today's partial day live from the base tables.
+Total loaned (current credit limits) and total collected (instalments whose collection completes later) keep moving
+after their day, so the dashboard always reads those two from the base tables.
+
+Run from this folder (e.g. nightly from cron, or as the body of a Snowflake TASK):
+  python build_loan_rollup.py            # re-aggregate the last 3 closed days (late CDC rows) and merge them in
+  python build_loan_rollup.py --days=30  # re-aggregate the last 30 closed days
+  python build_loan_rollup.py --full     # rebuild every day from scratch
+  --timeout=SECONDS                     # statement timeout for this job (default 0 = none)
+
+Env: LOAN_BOOK_ROLLUP_TABLE (database.schema.table, created if missing), EXCLUDE_TEST_USERS (same as the dashboard).
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent / ".env")
+
+from funnel_analyzer import get_connection
+
+ROLLUP_TABLE = os.environ.get("LOAN_BOOK_ROLLUP_TABLE", "").strip()
+EXCLUDE_TEST_USERS = os.environ.get("EXCLUDE_TEST_USERS", "true").strip().lower() in ("1", "true", "yes")
+DEFAULT_DAYS = 3
+
+_TEST_IDS = "SELECT ID FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE WHERE LOWER(EMAIL) LIKE '%stitch.money%'"
+_EXCL_PLAN = f" AND ip.CONSUMER_PROFILE_ID NOT IN ({_TEST_IDS})" if EXCLUDE_TEST_USERS else ""
+
+# Roll-up column -> (day column, summed expression, FROM ... WHERE ...). Same populations as the dashboard's loan-book
+# builders (_loan_book_settled_sql, _operations_*_total_sql); only sums that are final once their day has closed.
+FIGURES = {
+    "PLAN_SETTLED": ("ip.CREATED_AT", "COALESCE(ip.QUANTITY, ip.VALUE, ip.AMOUNT, ip.TOTAL_AMOUNT, 0)", f"""
+FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN ip
+WHERE 1=1{_EXCL_PLAN}"""),
+    "OPERATIONS_SETTLED": ("CREATED_AT", "QUANTITY", """
+FROM "CDC_OPERATIONS_PRODUCTION"."PUBLIC"."BNPLTRANSACTION"
+WHERE 1=1"""),
+    "MERCHANT_SETTLEMENT": ("CREATED_AT", "SETTLED_AMOUNT", """
+FROM "CDC_OPERATIONS_PRODUCTION"."PUBLIC"."MERCHANT SETTLEMENT"
+WHERE 1=1"""),
+    "OPERATIONS_COLLECTED": ("CREATED_AT", "QUANTITY", """
+FROM "CDC_OPERATIONS_PRODUCTION"."PUBLIC"."BNPLCARDTRANSACTION"
+WHERE 1=1"""),
+}
+
+
+def daily_source_sql(since_days=None):
+    """(DAY, FIGURE, V) rows for every figure over closed days, optionally only the last since_days of them."""
+    parts = []
+    for name, (day_col, value, from_where) in FIGURES.items():
+        window = f" AND {day_col} < CURRENT_DATE()"
+        if since_days is not None:
+            window += f" AND {day_col} >= DATEADD(day, -{int(since_days)}, CURRENT_DATE())"
+        parts.append(f"SELECT {day_col}::DATE AS DAY, '{name}' AS FIGURE, SUM({value}) AS V{from_where}{window}\nGROUP BY 1")
+    return "\nUNION ALL\n".join(parts)
+
+
+def merge_sql(since_days=None):
+    """MERGE the pivoted per-day sums into ROLLUP_TABLE (one column per figure, 0 when a source had no rows that day)."""
+    cols = list(FIGURES)
+    pivot = ", ".join(f"COALESCE(SUM(IFF(FIGURE = '{c}', V, NULL)), 0) AS {c}" for c in cols)
+    return f"""
+MERGE INTO {ROLLUP_TABLE} t
+USING (SELECT DAY, {pivot} FROM ({daily_source_sql(since_days)}) GROUP BY DAY) s
+ON t.DAY = s.DAY
+WHEN MATCHED THEN UPDATE SET {", ".join(f"t.{c} = s.{c}" for c in cols)}, t.REFRESHED_AT = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (DAY, {", ".join(cols)}, REFRESHED_AT)
+  VALUES (s.DAY, {", ".join(f"s.{c}" for c in cols)}, CURRENT_TIMESTAMP())
+"""
+
+
+def create_sql(replace=False):
+    cols = ", ".join(f"{c} NUMBER(38, 2)" for c in FIGURES)
+    verb = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+    return f"{verb} {ROLLUP_TABLE} (DAY DATE PRIMARY KEY, {cols}, REFRESHED_AT TIMESTAMP_LTZ) CLUSTER BY (DAY)"
+
+
+def main():
+    if not ROLLUP_TABLE:
+        print("Set LOAN_BOOK_ROLLUP_TABLE (database.schema.table) in .env first.")
+        sys.exit(1)
+    full = "--full" in sys.argv
+    days = next((int(a.split("=", 1)[1]) for a in sys.argv[1:] if a.startswith("--days=")), DEFAULT_DAYS)
+    timeout = next((int(a.split("=", 1)[1]) for a in sys.argv[1:] if a.startswith("--timeout=")), 0)
+
+    print("Connecting to Snowflake...")
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            # A --full MERGE scans every day of history; don't let a session/account statement timeout cancel it
+            cur.execute(f"ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = {timeout}")
+            cur.execute(create_sql(replace=full))
+            cur.execute(merge_sql(since_days=None if full else days))
+            print(f"{ROLLUP_TABLE}: {cur.rowcount} day rows merged ({'full rebuild' if full else f'last {days} closed days'})")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
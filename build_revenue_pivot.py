@@ -5,78 +5,223 @@ Output: Revenue_Pivot_By_Month_Product.xlsx with pivot table(s).
 Run from this folder:
   pip install -r requirements.txt
   python build_revenue_pivot.py
+  python build_revenue_pivot.py --check-rev   # also read 'rev' (in parallel) and compare monthly totals
+  python build_revenue_pivot.py --format=xlsx,csv,parquet   # default xlsx; parquet needs pyarrow
 """
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+import numpy as np
+import openpyxl
 import pandas as pd
 from pathlib import Path
 
 EXCEL_PATH = Path(__file__).parent / "Val Vol Rev - Product.xlsx"
 OUTPUT_PATH = Path(__file__).parent / "Revenue_Pivot_By_Month_Product.xlsx"
-
-
-def excel_serial_to_datetime(ser):
-    """Convert Excel serial date to pandas datetime."""
-    return pd.to_datetime(ser - 2, unit="D", origin="1899-12-30")
-
-
-def load_val_vol():
-    """Load 'val vol' sheet: columns D (date), VOL, VAL_ZAR, CUSTOMER_BANK, PRODUCT."""
-    df = pd.read_excel(EXCEL_PATH, sheet_name="val vol")
-    cols = list(df.columns)
-    if len(cols) >= 5:
-        df = df.rename(columns={
-            cols[0]: "Date",
-            cols[1]: "VOL",
-            cols[2]: "Revenue",
-            cols[3]: "CustomerBank",
-            cols[4]: "Product",
-        })
-    else:
-        df.columns = ["Date", "VOL", "Revenue", "CustomerBank", "Product"][: len(cols)]
-    df["Date"] = excel_serial_to_datetime(df["Date"])
-    df["Month"] = df["Date"].dt.to_period("M").astype(str)
-    return df[["Month", "Product", "Revenue"]].dropna(subset=["Revenue"])
-
-
-def load_rev():
+OUTPUT_FORMATS = ("xlsx", "csv", "parquet")
+EXCEL_EPOCH = np.datetime64("1899-12-30", "D")
+NAT_KEY = np.iinfo(np.int64).min  # int64 value of numpy NaT, so month_label() renders it as "NaT"
+
+
+def excel_serial_to_month_key(ser):
+    """Excel serial dates straight to month keys (see month_key); NaN -> NaT key, no datetime64[ns] column."""
+    days = np.floor(ser.to_numpy(dtype="float64") - 2)
+    missing = np.isnan(days)
+    days[missing] = 0
+    keys = (EXCEL_EPOCH + days.astype("timedelta64[D]")).astype("datetime64[M]").view("int64")
+    keys[missing] = NAT_KEY
+    return keys
+
+
+def month_key(dates):
+    """Integer month key (months since 1970-01) for datetimes; cheaper to group than strings."""
+    return np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[M]").view("int64")
+
+
+def month_label(keys):
+    """Turn month keys back into 'YYYY-MM' labels (only applied to the small pivot outputs)."""
+    return np.asarray(keys, dtype="int64").view("datetime64[M]").astype(str)
+
+
+def open_workbook(path=EXCEL_PATH):
+    """Open the workbook in openpyxl's streaming read-only mode (cached values, no styles/links).
+
+    The shared-strings table is parsed once here; read-only sheets resolve each string cell by
+    list index into it, so repeated Product/CustomerBank values come back as the same str object.
+    """
+    return openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+
+def read_sheet(wb, sheet_name, usecols=None):
+    """Read one sheet into a DataFrame; first row is the header (same as pd.read_excel).
+
+    usecols: optional list of 0-based column positions to keep; cells past the last one are never built.
+    """
+    ws = wb[sheet_name]
+    # Read-only iteration stops at the sheet's stored <dimension>, which some writers leave stale; drop it (as
+    # pd.read_excel does) so every row and column is streamed. Rows then come back ragged, so they are padded below.
+    ws.reset_dimensions()
+    max_col = max(usecols) + 1 if usecols else None
+    rows = ws.iter_rows(max_col=max_col, values_only=True)
+    if usecols:
+        pick = itemgetter(*usecols) if len(usecols) > 1 else (lambda row: (row[usecols[0]],))
+        rows = map(pick, rows)
+    header = tuple(next(rows, ()))
+    data = list(rows)
+    width = max([len(header), *map(len, data)])
+    if len(header) < width:
+        header += (None,) * (width - len(header))
+    data = [tuple(row) + (None,) * (width - len(row)) if len(row) < width else row for row in data]
+    # Blank header cells get pandas' "Unnamed: i" names so positional renames stay unambiguous
+    columns = [h if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+    return pd.DataFrame(data, columns=columns)
+
+
+def load_val_vol(wb):
+    """Load 'val vol' sheet: columns D (date), VOL, VAL_ZAR, CUSTOMER_BANK, PRODUCT.
+
+    Only date, VAL_ZAR and PRODUCT are read; VOL and CUSTOMER_BANK are skipped in the row stream.
+    """
+    df = read_sheet(wb, "val vol", usecols=[0, 2, 4])
+    df.columns = ["Date", "Revenue", "Product"]
+    # Numeric Revenue (stray text cells -> NaN) so the sum never runs on an object column
+    df["Revenue"] = pd.to_numeric(df["Revenue"], errors="coerce")
+    # Drop empty rows first so only surviving dates are converted
+    df = df.dropna(subset=["Revenue"])
+    df = df.assign(Month=excel_serial_to_month_key(df["Date"]))
+    return df[["Month", "Product", "Revenue"]].astype({"Product": "category"})
+
+
+def load_rev(wb):
     """Load 'rev' sheet: date, revenue, product."""
-    df = pd.read_excel(EXCEL_PATH, sheet_name="rev")
+    df = read_sheet(wb, "rev")
     cols = list(df.columns)
     if len(cols) >= 3:
         df = df.rename(columns={cols[0]: "Date", cols[1]: "Revenue", cols[2]: "Product"})
     else:
         df.columns = ["Date", "Revenue", "Product"][: len(cols)]
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(subset=["Date", "Revenue"])
-    df["Month"] = df["Date"].dt.to_period("M").astype(str)
-    return df[["Month", "Product", "Revenue"]]
+    df["Revenue"] = pd.to_numeric(df["Revenue"], errors="coerce")
+    df = df.dropna(subset=["Date", "Revenue"])[["Date", "Product", "Revenue"]]
+    df = df.assign(Date=pd.to_datetime(df["Date"], errors="coerce")).dropna(subset=["Date"])
+    df = df.assign(Month=month_key(df["Date"]))
+    return df[["Month", "Product", "Revenue"]].astype({"Product": "category"})
 
 
-def main():
+def _load_with_own_workbook(loader):
+    """Run a loader on its own read-only workbook handle (openpyxl handles are not shared across threads)."""
+    wb = open_workbook()
+    try:
+        return loader(wb)
+    finally:
+        wb.close()
+
+
+def _print_rev_mismatches(data, rev):
+    """Print months where 'val vol' and 'rev' monthly revenue totals disagree."""
+    a = data.groupby("Month", sort=True)["Revenue"].sum()
+    b = rev.groupby("Month", sort=True)["Revenue"].sum()
+    both = pd.concat([a.rename("val_vol"), b.rename("rev")], axis=1).fillna(0)
+    diff = both[~np.isclose(both["val_vol"], both["rev"])]
+    if diff.empty:
+        print("Cross-check: 'val vol' and 'rev' monthly totals match.")
+        return
+    diff.index = month_label(diff.index)
+    print("Cross-check: monthly totals differ between 'val vol' and 'rev':")
+    print(diff.to_string())
+
+
+def _excel_writer_engine():
+    """xlsxwriter streams XML out faster than openpyxl builds its workbook DOM; fall back if not installed."""
     try:
-        data = load_val_vol()
-    except Exception as e:
-        print("val vol failed:", e)
-        data = load_rev()
+        import xlsxwriter  # noqa: F401
+        return "xlsxwriter"
+    except ImportError:
+        return "openpyxl"
+
+
+def write_flat_outputs(pivot_wide, pivot_long, fmt):
+    """Write both pivots as CSV or Parquet next to OUTPUT_PATH (no XML/zip step). Returns the paths written."""
+    wide_path = OUTPUT_PATH.with_suffix("." + fmt)
+    long_path = OUTPUT_PATH.with_name(OUTPUT_PATH.stem + "_Long." + fmt)
+    if fmt == "csv":
+        pivot_wide.to_csv(wide_path)
+        pivot_long.to_csv(long_path, index=False)
+    else:
+        # Parquet needs string column names; pivot_long keeps Product as a categorical
+        pivot_wide.rename(columns=str).to_parquet(wide_path)
+        pivot_long.to_parquet(long_path, index=False)
+    return [wide_path, long_path]
+
+
+def parse_formats(argv):
+    """Return output formats from --format=a,b (default: xlsx only)."""
+    for arg in argv:
+        if arg.startswith("--format="):
+            formats = [f.strip().lower() for f in arg.split("=", 1)[1].split(",") if f.strip()]
+            unknown = [f for f in formats if f not in OUTPUT_FORMATS]
+            if unknown:
+                raise SystemExit(f"Unknown --format value(s): {', '.join(unknown)} (choose from {', '.join(OUTPUT_FORMATS)})")
+            return formats or ["xlsx"]
+    return ["xlsx"]
+
+
+def main(check_rev=False, formats=("xlsx",)):
+    # Open once; read only the sheet that exists instead of parsing again on a failed attempt
+    wb = open_workbook()
+    sheets = set(wb.sheetnames)
+    if not sheets & {"val vol", "rev"}:
+        wb.close()
+        raise SystemExit(f"{EXCEL_PATH.name}: expected a 'val vol' or 'rev' sheet, found {sorted(sheets)}")
+    if check_rev and {"val vol", "rev"} <= sheets:
+        wb.close()
+        # Parse both sheets concurrently; 'val vol' stays the source of the pivot
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fut_val_vol = pool.submit(_load_with_own_workbook, load_val_vol)
+            fut_rev = pool.submit(_load_with_own_workbook, load_rev)
+            data, rev = fut_val_vol.result(), fut_rev.result()
+        _print_rev_mismatches(data, rev)
+    else:
+        try:
+            data = load_val_vol(wb) if "val vol" in sheets else load_rev(wb)
+        finally:
+            wb.close()
 
-    # Pivot 1: Rows = Month, Columns = Product, Values = Sum(Revenue)
-    pivot_wide = data.pivot_table(
-        index="Month", columns="Product", values="Revenue", aggfunc="sum", fill_value=0
-    )
-    pivot_wide["Total"] = pivot_wide.sum(axis=1)
-    pivot_wide.loc["Total"] = pivot_wide.sum(axis=0)
-
-    # Pivot 2: Long format (Month, Product, Revenue)
-    pivot_long = data.groupby(["Month", "Product"], as_index=False)["Revenue"].sum()
+    # One aggregation pass: long format (Month, Product, Revenue), then reshape to wide
+    pivot_long = data.groupby(["Month", "Product"], as_index=False, observed=True, sort=False)["Revenue"].sum()
     pivot_long = pivot_long.sort_values(["Month", "Product"])
 
-    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as writer:
-        pivot_wide.to_excel(writer, sheet_name="Pivot_Month_x_Product")
-        pivot_long.to_excel(writer, sheet_name="Pivot_Long", index=False)
-
-    print("Created:", OUTPUT_PATH)
-    print("Sheets: Pivot_Month_x_Product (month × product), Pivot_Long (month, product, revenue)")
-    return OUTPUT_PATH
+    # Pivot 1: Rows = Month, Columns = Product, Values = Sum(Revenue)
+    pivot_wide = pivot_long.set_index(["Month", "Product"])["Revenue"].unstack(fill_value=0)
+    pivot_wide.columns = pd.Index(pivot_wide.columns.astype(object), name="Product")
+    pivot_wide.index = pd.Index(month_label(pivot_wide.index), name="Month")
+    # Totals from one ndarray: row sums, column sums, grand total (no per-axis Series dispatch).
+    # to_numpy() of the unstacked frame is a transposed (F-ordered) view; copy to C order so the
+    # row-axis sum walks memory linearly.
+    values = np.ascontiguousarray(pivot_wide.to_numpy(dtype="float64"))
+    row_tot = values.sum(axis=1)
+    pivot_wide["Total"] = row_tot
+    pivot_wide.loc["Total"] = np.append(values.sum(axis=0), row_tot.sum())
+
+    # Pivot 2: Long format, months labelled for output
+    pivot_long["Month"] = month_label(pivot_long["Month"])
+
+    written = []
+    if "xlsx" in formats:
+        # No constant_memory: pandas emits the index column before the data columns, which that mode would drop
+        with pd.ExcelWriter(OUTPUT_PATH, engine=_excel_writer_engine()) as writer:
+            pivot_wide.to_excel(writer, sheet_name="Pivot_Month_x_Product")
+            pivot_long.to_excel(writer, sheet_name="Pivot_Long", index=False)
+        written.append(OUTPUT_PATH)
+        print("Created:", OUTPUT_PATH)
+        print("Sheets: Pivot_Month_x_Product (month × product), Pivot_Long (month, product, revenue)")
+    for fmt in formats:
+        if fmt != "xlsx":
+            for path in write_flat_outputs(pivot_wide, pivot_long, fmt):
+                written.append(path)
+                print("Created:", path)
+    return written
 
 
 if __name__ == "__main__":
-    main()
+    main(check_rev="--check-rev" in sys.argv, formats=parse_formats(sys.argv[1:]))
@@ -9,11 +9,17 @@ import hmac
 import html
 import os
 import re
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, wait
 from datetime import date, datetime, timedelta
+from functools import wraps
+from types import MappingProxyType
 from typing import Optional
 from urllib.parse import quote
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -55,6 +61,7 @@ PALETTE = {
 SPACING = {"section": "32px", "component": "16px", "inside": "8px"}
 # Tooltip when a metric shows "—" or "No data" (reduces uncertainty for execs)
 TOOLTIP_NO_DATA = "Not enough cohort maturity"
+_TOOLTIP_NO_DATA_ESC = html.escape(TOOLTIP_NO_DATA)
 
 
 def _value_with_tooltip(style: str, value: str, show_tooltip_if_empty: bool = True, custom_tooltip: str = None) -> str:
@@ -63,7 +70,7 @@ def _value_with_tooltip(style: str, value: str, show_tooltip_if_empty: bool = Tr
     if custom_tooltip:
         title = html.escape(custom_tooltip)
     elif show_tooltip_if_empty and (value == "—" or value == "No data"):
-        title = TOOLTIP_NO_DATA
+        title = _TOOLTIP_NO_DATA_ESC
     if title:
         return f'<div style="{style}" title="{title}">{value}</div>'
     return f'<div style="{style}">{value}</div>'
@@ -71,13 +78,29 @@ def _value_with_tooltip(style: str, value: str, show_tooltip_if_empty: bool = Tr
 st.set_page_config(page_title="Portfolio Intelligence Console", layout="wide", initial_sidebar_state="expanded")
 
 MAX_ROWS = 100_000
+_TRAILING_LIMIT = re.compile(r"\blimit\s+\d+\s*;?\s*$", re.I)
+
+
+def _with_limit(sql, n=MAX_ROWS):
+    """Append a server-side LIMIT (capped at MAX_ROWS) unless sql already ends with one."""
+    sql = sql.rstrip().rstrip(";")
+    if _TRAILING_LIMIT.search(sql):
+        return sql
+    return f"{sql} LIMIT {min(int(n), MAX_ROWS)}"
+
+
 DATE_PATTERN = re.compile(r"date|time|ts|timestamp|created|updated|_at$", re.I)
 ID_PATTERN = re.compile(r"id$|_id$|key$|uuid", re.I)
+# Status/flag vocabularies used by compute_bnpl_metrics (matched against lower-cased values).
+APPROVED_STATUS_PATTERN = re.compile(r"approv|accept|success|completed|disburs")
+REJECTED_STATUS_PATTERN = re.compile(r"reject|decline|deny|fail")
+DEFAULT_FLAG_PATTERN = re.compile(r"yes|true|1|default|delinquent")
+_MD_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")  # **bold** in intelligence-summary bullets
 
 
-def inject_css():
-    st.markdown(
-        f"""
+# Global stylesheet as one constant string (it only reads constants), so inject_css() emits it without re-formatting.
+# dashboard.py is the Streamlit script, so this is still rebuilt on each rerun, just once per run rather than per call.
+_CSS_HTML = f"""
     <style>
     :root {{
       /* Surface & background */
@@ -417,52 +440,118 @@ def inject_css():
     /* Competitor logos: sharper scaling */
     .stImage img {{ object-fit: contain; image-rendering: -webkit-optimize-contrast; image-rendering: crisp-edges; }}
     </style>
-    """,
-        unsafe_allow_html=True,
-    )
+    """
+
+
+def inject_css():
+    """Emit the global stylesheet. Must run on every rerun: Streamlit removes elements a rerun does not re-emit,
+    so a once-per-session guard would drop the styles after the first interaction."""
+    st.markdown(_CSS_HTML, unsafe_allow_html=True)
+
+
+# Static HTML fragments that only depend on PALETTE/SPACING, built once per script run rather than at each render
+# site; dynamic parts are filled via Template.
+_STICKY_BAR_TEMPLATE = string.Template(
+    '<div class="bnpl-sticky-context-bar">'
+    '<span class="bnpl-context-date">$date_range</span>'
+    '<span class="bnpl-context-refresh">$refreshed</span>'
+    '<span class="bnpl-context-compare">Compare: <strong>$compare</strong> <span style="font-size:0.7em; opacity:0.85;">(change in sidebar)</span></span>'
+    '</div>'
+)
+_INSIGHTS_BOX_OPEN = (
+    '<div class="thesis-box" style="margin-top:' + SPACING["component"] + ';">'
+    '<p style="margin:0 0 0.5rem 0; font-size:0.75rem; text-transform:uppercase; letter-spacing:0.04em; color:' + PALETTE["text_soft"] + ';">Insights</p>'
+    '<ul style="margin:0; padding-left:1.2rem; font-size:0.85rem; line-height:1.6; color:' + PALETTE["text"] + ';">'
+)
+_INSIGHTS_BOX_CLOSE = (
+    '</ul>'
+    '<p style="margin:0.5rem 0 0 0; font-size:0.75rem; color:' + PALETTE["text_soft"] + ';">Hover over each metric above for a short tooltip. Recovery rate = collected ÷ settled. Utilization = settled ÷ credit allocated.</p>'
+    '</div>'
+)
+
+
+# Invariant part of chart_layout(), built once per script run (PALETTE never changes) instead of on every chart.
+_CHART_LAYOUT_BASE = MappingProxyType(dict(
+    paper_bgcolor=PALETTE["panel"],
+    plot_bgcolor=PALETTE["panel"],
+    font=dict(color=PALETTE["text"], family="Inter, sans-serif", size=12),
+    margin=dict(t=32, b=32, l=32, r=16),
+    xaxis=dict(gridcolor=PALETTE["border"], zerolinecolor=PALETTE["border"]),
+    yaxis=dict(gridcolor=PALETTE["border"], zerolinecolor=PALETTE["border"]),
+    showlegend=True,
+    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(size=10), bgcolor="rgba(0,0,0,0)", bordercolor=PALETTE["border"], borderwidth=0),
+    hoverlabel=dict(bgcolor=PALETTE["panel"], bordercolor=PALETTE["accent"]),
+))
 
 
 def chart_layout(height=320, title=None, **kwargs):
     """Shared Plotly layout — muted grid, compact legend."""
-    return dict(
-        paper_bgcolor=PALETTE["panel"],
-        plot_bgcolor=PALETTE["panel"],
-        font=dict(color=PALETTE["text"], family="Inter, sans-serif", size=12),
-        title=dict(text=title or "", font=dict(size=14, color=PALETTE["text_soft"])),
-        margin=dict(t=32, b=32, l=32, r=16),
-        height=height,
-        xaxis=dict(gridcolor=PALETTE["border"], zerolinecolor=PALETTE["border"]),
-        yaxis=dict(gridcolor=PALETTE["border"], zerolinecolor=PALETTE["border"]),
-        showlegend=True,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(size=10), bgcolor="rgba(0,0,0,0)", bordercolor=PALETTE["border"], borderwidth=0),
-        hoverlabel=dict(bgcolor=PALETTE["panel"], bordercolor=PALETTE["accent"]),
+    return {
+        **_CHART_LAYOUT_BASE,
+        "title": dict(text=title or "", font=dict(size=14, color=PALETTE["text_soft"])),
+        "height": height,
         **kwargs,
-    )
+    }
+
+
+def _env_seconds(name, default):
+    """Non-negative int seconds from env var name; default when unset or not a number (never fails at startup)."""
+    try:
+        return max(0, int(os.environ.get(name, "").strip() or default))
+    except ValueError:
+        return default
+
+
+# Server-side cap per statement so an abandoned dashboard query does not keep the warehouse busy. Set on the
+# dashboard's own session only; the CLI scripts share get_connection() and keep the account default.
+_STATEMENT_TIMEOUT_SECONDS = _env_seconds("SNOWFLAKE_STATEMENT_TIMEOUT", 120)
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_conn():
+    conn = get_connection()
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = {_STATEMENT_TIMEOUT_SECONDS}")
+    _create_excl_temp_table(conn)
+    return conn
 
 
-@st.cache_resource(ttl=300)
 def get_conn():
-    return get_connection()
+    """Long-lived Snowflake connection (no TTL). A cheap SELECT 1 probe per rerun; reconnect only if it fails. The
+    session's test-ID temp table is refilled every _METADATA_TTL_SECONDS, since the session can live for days."""
+    conn = _cached_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+    except Exception:
+        _cached_conn.clear()
+        conn = _cached_conn()
+    excl = _excl_state()
+    if time.monotonic() - excl["refreshed_at"] >= _METADATA_TTL_SECONDS:
+        _create_excl_temp_table(conn, excl["table"])
+    return conn
+
+
+# Placeholder metrics when Snowflake is unavailable (read-only; _demo_metrics() hands out copies).
+_DEMO_METRICS = MappingProxyType({
+    "applications": 12500,
+    "approval_rate_pct": 54.0,
+    "rejection_rate_pct": 46.0,
+    "gmv": 420000,
+    "aov": 336.0,
+    "active_customers": 3200,
+    "default_rate_pct": None,
+    "arrears_rate_pct": None,
+    "growth_mom_pct": 12.0,
+    "repeat_rate_pct": 28.0,
+    "data_source": None,
+})
 
 
 def _demo_metrics():
     """Placeholder metrics when Snowflake is unavailable. Returns (metrics_dict, trend_df)."""
-    return (
-        {
-            "applications": 12500,
-            "approval_rate_pct": 54.0,
-            "rejection_rate_pct": 46.0,
-            "gmv": 420000,
-            "aov": 336.0,
-            "active_customers": 3200,
-            "default_rate_pct": None,
-            "arrears_rate_pct": None,
-            "growth_mom_pct": 12.0,
-            "repeat_rate_pct": 28.0,
-            "data_source": None,
-        },
-        None,
-    )
+    # Copy: the render path adds keys (e.g. penalty_ratio_pct) to the metrics dict it receives
+    return dict(_DEMO_METRICS), None
 
 
 def quote_id(name):
@@ -470,10 +559,29 @@ def quote_id(name):
     return '"' + str(name).replace('"', '""') + '"'
 
 
-def get_databases(conn):
+# Metadata helpers: cached for 10 minutes. The leading underscore on _conn tells Streamlit not to hash
+# the connection; anything that changes the answer (database, schema, flags) must be an explicit argument.
+_METADATA_TTL_SECONDS = 600
+# Column lists change with deployments, not between renders, so they are cached longer than counts and listings.
+_COLUMNS_TTL_SECONDS = 3600
+
+
+def _info_schema(database=None):
+    """INFORMATION_SCHEMA of the given database, or of the session's current database when None."""
+    return f"{quote_id(database)}.INFORMATION_SCHEMA" if database else "INFORMATION_SCHEMA"
+
+
+def _qualified(schema, table, database=None):
+    return ".".join(quote_id(p) for p in ((database, schema, table) if database else (schema, table)))
+
+
+@st.cache_data(ttl=_METADATA_TTL_SECONDS, show_spinner=False)
+def get_databases(_conn):
     """Return list of database names the user can access."""
-    with conn.cursor() as cur:
-        cur.execute("SHOW DATABASES")
+    with _conn.cursor() as cur:
+        # TERSE: only name/kind/created_on columns. SHOW results are not Arrow-backed (no fetch_pandas_all), and
+        # the list is a few dozen rows, so a plain fetchall is the cheap path.
+        cur.execute("SHOW TERSE DATABASES")
         # Result has 'name' column (and others)
         cols = [d[0] for d in cur.description]
         idx = cols.index("name") if "name" in cols else 0
@@ -483,77 +591,136 @@ def get_databases(conn):
 def use_database(conn, database):
     """Switch session to the given database."""
     with conn.cursor() as cur:
-        cur.execute("USE DATABASE " + quote_id(database))
+        # IDENTIFIER() keeps the statement text fixed; the quoted name is bound rather than concatenated.
+        cur.execute("USE DATABASE IDENTIFIER(%s)", (quote_id(database),))
 
 
-def get_tables(conn, bnpl_only=False):
-    """Return list of (schema, table_name) in the current database (call use_database first)."""
-    with conn.cursor() as cur:
-        sql = """
+@st.cache_data(ttl=_METADATA_TTL_SECONDS, show_spinner=False)
+def get_tables(_conn, bnpl_only=False, database=None):
+    """Return list of (schema, table_name) in database (default: the current database; call use_database first)."""
+    with _conn.cursor() as cur:
+        if bnpl_only:
+            # SHOW TABLES is answered from the metadata service (no INFORMATION_SCHEMA view scan).
+            # SHOW ... LIKE only matches table names, so filter schema OR name here and sort client-side.
+            cur.execute("SHOW TERSE TABLES IN DATABASE" + (" " + quote_id(database) if database else ""))
+            cols = [d[0] for d in cur.description]
+            schema_idx, name_idx = cols.index("schema_name"), cols.index("name")
+            return sorted(
+                (row[schema_idx], row[name_idx])
+                for row in cur.fetchall()
+                if "BNPL" in str(row[schema_idx]).upper() or "BNPL" in str(row[name_idx]).upper()
+            )
+        cur.execute(f"""
             SELECT TABLE_SCHEMA, TABLE_NAME
-            FROM INFORMATION_SCHEMA.TABLES
+            FROM {_info_schema(database)}.TABLES
             WHERE TABLE_TYPE = 'BASE TABLE'
-        """
-        params = []
-        if bnpl_only:
-            sql += " AND (UPPER(TABLE_SCHEMA) LIKE %s OR UPPER(TABLE_NAME) LIKE %s)"
-            params.extend(["%BNPL%", "%BNPL%"])
-        sql += " ORDER BY TABLE_SCHEMA, TABLE_NAME"
-        cur.execute(sql, params)
+            ORDER BY TABLE_SCHEMA, TABLE_NAME
+        """)
         return cur.fetchall()
 
 
-def get_columns(conn, schema, table):
-    """Return list of (column_name, data_type). Uses current database."""
-    with conn.cursor() as cur:
-        cur.execute("""
+@st.cache_data(ttl=_METADATA_TTL_SECONDS, show_spinner=False)
+def get_columns(_conn, schema, table, database=None):
+    """Return {column_name: data_type} in ordinal order. Uses database, else the current database."""
+    with _conn.cursor() as cur:
+        cur.execute(f"""
             SELECT COLUMN_NAME, DATA_TYPE
-            FROM INFORMATION_SCHEMA.COLUMNS
+            FROM {_info_schema(database)}.COLUMNS
             WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
             ORDER BY ORDINAL_POSITION
         """, (schema, table))
-        return cur.fetchall()
+        return dict(cur)
 
 
-def get_row_count(conn, schema, table):
-    with conn.cursor() as cur:
-        cur.execute(f'SELECT COUNT(*) FROM "{schema}"."{table}"')
+@st.cache_data(ttl=_COLUMNS_TTL_SECONDS, show_spinner=False)
+def get_columns_batch(_conn, tables: tuple) -> dict:
+    """Column names for many (database, schema, table) with one INFORMATION_SCHEMA query per database.
+    Returns {(db, schema, table): [columns in ordinal order]}; tables that do not exist are absent."""
+    by_db = {}
+    for db, sch, tbl in tables:
+        by_db.setdefault(db, []).append((sch, tbl))
+    out = {}
+    with _conn.cursor() as cur:
+        for db, pairs in by_db.items():
+            cur.execute(f"""
+                SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME
+                FROM {_info_schema(db)}.COLUMNS
+                WHERE (TABLE_SCHEMA, TABLE_NAME) IN ({", ".join(["(%s, %s)"] * len(pairs))})
+                ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION
+            """, tuple(v for pair in pairs for v in pair))
+            for sch, tbl, col in cur:
+                out.setdefault((db, sch, tbl), []).append(col)
+    return out
+
+
+def _metadata_row_count(cur, schema, table, database=None):
+    """ROW_COUNT maintained by Snowflake in INFORMATION_SCHEMA.TABLES (no warehouse scan). None for views etc."""
+    cur.execute(
+        f"SELECT ROW_COUNT FROM {_info_schema(database)}.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+        (schema, table),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+@st.cache_data(ttl=_METADATA_TTL_SECONDS, show_spinner=False)
+def get_row_count(_conn, schema, table, database=None, exact=False):
+    """Row count for schema.table in database (default: the current database).
+
+    exact=False reads the metadata ROW_COUNT and only falls back to COUNT(*) when it is unavailable.
+    """
+    with _conn.cursor() as cur:
+        if not exact:
+            n = _metadata_row_count(cur, schema, table, database)
+            if n is not None:
+                return n
+        cur.execute("SELECT COUNT(*) FROM IDENTIFIER(%s)", (_qualified(schema, table, database),))
         return cur.fetchone()[0]
 
 
-def get_row_count_qualified(conn, database: str, schema: str, table: str):
-    """Row count for a fully qualified table (any database)."""
-    with conn.cursor() as cur:
-        cur.execute(f'SELECT COUNT(*) FROM "{database}"."{schema}"."{table}"')
+@st.cache_data(ttl=_METADATA_TTL_SECONDS, show_spinner=False)
+def get_row_count_qualified(_conn, database: str, schema: str, table: str, exact=False):
+    """Row count for a fully qualified table (any database); exact as in get_row_count."""
+    with _conn.cursor() as cur:
+        if not exact:
+            n = _metadata_row_count(cur, schema, table, database)
+            if n is not None:
+                return n
+        cur.execute("SELECT COUNT(*) FROM IDENTIFIER(%s)", (_qualified(schema, table, database),))
         return cur.fetchone()[0]
 
 
+@st.cache_data(ttl=_COLUMNS_TTL_SECONDS, show_spinner=False)
+def _describe_columns(_conn, database: str, schema: str, table: str):
+    """Column names via DESCRIBE TABLE (cloud services only, no warehouse). Raises on error, so failures are not cached."""
+    with _conn.cursor() as cur:
+        cur.execute(f"DESCRIBE TABLE {_qualified(schema, table, database)}")
+        return [r[0] for r in cur.fetchall()]
+
+
 def get_table_columns(conn, database: str, schema: str, table: str):
-    """Return list of column names for a qualified table, or [] on error."""
+    """Return list of column names for a qualified table, or [] on error. Cached for _COLUMNS_TTL_SECONDS."""
     if conn is None:
         return []
     try:
-        qual = f'"{database}"."{schema}"."{table}"'
-        with conn.cursor() as cur:
-            cur.execute(f"SELECT * FROM {qual} LIMIT 0")
-            desc = cur.description
-        return [d[0] for d in desc] if desc else []
+        if (database, schema, table) in DESCRIBE_TABLES_QUALIFIED:
+            cols = get_columns_batch(conn, tuple(DESCRIBE_TABLES_QUALIFIED)).get((database, schema, table))
+            if cols:
+                return cols
+        return _describe_columns(conn, database, schema, table)
     except Exception:
         return []
 
 
+# Amount keywords as whole underscore-delimited words, so e.g. CONSUMER_NAME no longer matches "sum".
+_AMOUNT_RE = re.compile(r"(?:^|_)(?:amount|value|total|quantity|sum|settled|principal|gmv|tpv)(?:$|_)", re.I)
+
+
 def _first_amount_like_column(columns):
     """Return first column name that looks like an amount (case-insensitive)."""
     if not columns:
         return None
-    keywords = ("amount", "value", "total", "quantity", "sum", "settled", "principal", "gmv", "tpv")
-    for c in columns:
-        if c is None:
-            continue
-        lower = str(c).lower()
-        if any(k in lower for k in keywords):
-            return c
-    return columns[0] if columns else None
+    return next((c for c in columns if c is not None and _AMOUNT_RE.search(str(c))), columns[0])
 
 
 # Known BNPL tables (database, schema, table) — use .env to point at your real data first
@@ -567,9 +734,68 @@ _coll_sch = os.environ.get("BNPL_COLLECTIONS_SCHEMA", _def_sch or "PAYMENTS").st
 _coll_tbl = os.environ.get("BNPL_COLLECTIONS_TABLE", "BNPL_COLLECTIONS").strip()
 # Exclude test users (e.g. stitch.money emails). Aligns with BNPL Reporting Notebook.
 EXCLUDE_TEST_USERS = os.environ.get("EXCLUDE_TEST_USERS", "true").strip().lower() in ("1", "true", "yes")
+# Optional daily loan-book roll-up maintained by build_loan_rollup.py (database.schema.table); empty = sum the base tables.
+LOAN_BOOK_ROLLUP_TABLE = os.environ.get("LOAN_BOOK_ROLLUP_TABLE", "").strip()
 _TEST_IDS_SUBQUERY = "(SELECT ID FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE WHERE LOWER(EMAIL) LIKE '%stitch.money%')"
-def _excl_cp(): return " AND ID NOT IN " + _TEST_IDS_SUBQUERY if EXCLUDE_TEST_USERS else ""
-def _excl_plan(): return " AND CONSUMER_PROFILE_ID NOT IN " + _TEST_IDS_SUBQUERY if EXCLUDE_TEST_USERS else ""
+
+
+@st.cache_resource(show_spinner=False)
+def _excl_state():
+    """{"table": qualified name of the session temp table holding the test IDs, or None; "refreshed_at": monotonic time
+    it was last filled}. Set by _create_excl_temp_table when _cached_conn opens a session and again from get_conn every
+    _METADATA_TTL_SECONDS; a cache_resource (not a module global) so it survives reruns along with the connection.
+    While set, exclusions hash-join against that small table instead of re-running the subquery."""
+    return {"table": None, "refreshed_at": 0.0}
+
+
+def _create_excl_temp_table(conn, name=None):
+    """Materialise the test-user IDs for this Snowflake session. Qualified with the session's database/schema at
+    creation time, since use_database() later moves the session elsewhere; name refills that existing table instead
+    (get_conn's periodic refresh, so test accounts created after startup are excluded too). On failure the inline
+    subquery is kept."""
+    state = _excl_state()
+    state["table"] = None
+    state["refreshed_at"] = time.monotonic()
+    if not EXCLUDE_TEST_USERS:
+        return
+    try:
+        with conn.cursor() as cur:
+            if name is None:
+                cur.execute("SELECT CURRENT_DATABASE(), CURRENT_SCHEMA()")
+                db, schema = cur.fetchone()
+                if not db or not schema:
+                    return
+                name = _qualified(schema, "_EXCL_TEST_IDS", db)
+            cur.execute(f"CREATE OR REPLACE TEMPORARY TABLE {name} AS {_TEST_IDS_SUBQUERY[1:-1]}")
+        state["table"] = name
+    except Exception:
+        state["table"] = None
+
+
+# bound=True: the SQL will be executed with bind parameters, so the LIKE wildcards must be written as %%.
+def _excl_sub(bound):
+    excl_table = _excl_state()["table"]
+    if excl_table:
+        return f"(SELECT ID FROM {excl_table})"
+    return _TEST_IDS_SUBQUERY.replace("%", "%%") if bound else _TEST_IDS_SUBQUERY
+def _excl_cp(bound=False, alias=None): return f" AND {alias + '.' if alias else ''}ID NOT IN " + _excl_sub(bound) if EXCLUDE_TEST_USERS else ""
+def _excl_plan(bound=False): return " AND CONSUMER_PROFILE_ID NOT IN " + _excl_sub(bound) if EXCLUDE_TEST_USERS else ""
+
+
+def _date_params(from_date, to_date):
+    """Half-open (from, to + 1 day) as YYYY-MM-DD bind values for col >= %s AND col < %s. Comparing the bare column
+    (not DATE(col)) keeps the predicate SARGable, so Snowflake can prune micro-partitions on the timestamp."""
+    return from_date.strftime("%Y-%m-%d"), (to_date + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _date_range_predicate(col, from_date, to_date):
+    """(predicate, params) for a half-open date range on col (an SQL expression, quoted by the caller if needed)."""
+    return f"{col} >= %s AND {col} < %s", _date_params(from_date, to_date)
+
+
+def _split_query(query):
+    """(sql, params) for a query given either as plain SQL or as the (sql, params) pair a *_sql builder returns."""
+    return query if isinstance(query, tuple) else (query, None)
 
 
 def _get_test_consumer_ids(conn) -> set:
@@ -578,7 +804,7 @@ def _get_test_consumer_ids(conn) -> set:
         return set()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT ID FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE WHERE LOWER(EMAIL) LIKE '%stitch.money%'")
+            cur.execute(_excl_sub(False)[1:-1])
             rows = cur.fetchall()
         return {row[0] for row in rows if row and row[0] is not None}
     except Exception:
@@ -620,35 +846,107 @@ DESCRIBE_TABLES_QUALIFIED = [
 ]
 
 
-def load_table_qualified(conn, database: str, schema: str, table: str, limit=MAX_ROWS, date_col=None, from_date=None, to_date=None):
-    """Load table by fully qualified name. Optional date filter: date_col between from_date and to_date (inclusive)."""
-    qual = f'"{database}"."{schema}"."{table}"'
-    use_date = date_col and from_date is not None and to_date is not None
-    with conn.cursor() as cur:
-        if use_date:
-            # Snowflake: compare date part; pass as YYYY-MM-DD strings
-            fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+def _fetch_df(cur):
+    """Result of the executed cursor as a DataFrame. Streams the Arrow result chunk by chunk (fetch_pandas_batches), so
+    each chunk is converted as it arrives rather than after the whole result is buffered as one Arrow table; falls back
+    to fetchall for non-Arrow results (SHOW/DESCRIBE) or without the connector's pandas extra. Only those two cases,
+    raised before the first chunk is read, fall back; any later error propagates rather than returning a partial frame."""
+    from snowflake.connector.errors import NotSupportedError, ProgrammingError
+    cols = [d[0] for d in cur.description]
+    try:
+        chunks = iter(cur.fetch_pandas_batches())
+        first = next(chunks, None)
+    except (NotSupportedError, ProgrammingError):
+        return pd.DataFrame(cur.fetchall(), columns=cols)
+    batches = [] if first is None else [first, *chunks]
+    if not batches:
+        return pd.DataFrame(columns=cols)
+    return batches[0] if len(batches) == 1 else pd.concat(batches, ignore_index=True)
+
+
+_DATE_PREFIX_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _arrow_string_dtype():
+    """Arrow-backed string dtype with NaN missing-value semantics (comparisons stay plain numpy bool masks), or None on
+    pandas/pyarrow versions without it, in which case strings stay object columns."""
+    for make in (lambda: pd.StringDtype("pyarrow", na_value=float("nan")), lambda: pd.StringDtype("pyarrow_numpy")):
+        try:
+            return make()
+        except (ImportError, TypeError, ValueError):
+            continue
+    return None
+
+
+_ARROW_STRING = _arrow_string_dtype()
+
+
+def _coerce_object_columns(df, parse_dates=True):
+    """Parse object columns in place: fully numeric ones via pd.to_numeric, then (parse_dates) ones whose first
+    non-null value looks like YYYY-MM-DD via pd.to_datetime. One sample per column instead of a regex over every cell.
+    Remaining all-string columns move to _ARROW_STRING: a fraction of the memory of Python str objects, faster groupbys."""
+    for c in df.columns:
+        col = df[c]
+        if col.dtype != object:
+            continue
+        try:
+            df[c] = pd.to_numeric(col)
+            continue
+        except (ValueError, TypeError):
+            pass
+        if parse_dates:
+            first = col.first_valid_index()
+            if first is not None and _DATE_PREFIX_RE.match(str(col.at[first])):
+                try:
+                    df[c] = pd.to_datetime(col, errors="coerce")
+                    continue
+                except (ValueError, TypeError):
+                    pass
+        if _ARROW_STRING is not None and pd.api.types.infer_dtype(col, skipna=True) == "string":
+            df[c] = col.astype(_ARROW_STRING)
+    return df
+
+
+# Whole-table downloads (up to MAX_ROWS) are reused across reruns and tab switches instead of re-fetched each time;
+# Streamlit hands every caller its own copy, so callers may still add columns in place.
+_TABLE_TTL_SECONDS = 300
+
+
+@st.cache_data(ttl=_TABLE_TTL_SECONDS, max_entries=64, show_spinner=False)
+def _cached_table_qualified(_conn, database, schema, table, limit, date_col, from_date, to_date):
+    """load_table_qualified's download, memoized per (table, limit, date filter)."""
+    qual = _qualified(schema, table, database)
+    with _conn.cursor() as cur:
+        # Table and column are bound through IDENTIFIER(), so the statement text is the same for every table and range
+        if date_col:
+            fd, td = _date_params(from_date, to_date)
+            col = quote_id(date_col)
             cur.execute(
-                f'SELECT * FROM {qual} WHERE DATE("{date_col}") >= %s AND DATE("{date_col}") <= %s LIMIT {limit}',
-                (fd, td),
+                _with_limit("SELECT * FROM IDENTIFIER(%s) WHERE IDENTIFIER(%s) >= %s AND IDENTIFIER(%s) < %s", limit),
+                (qual, col, fd, col, td),
             )
         else:
-            cur.execute(f"SELECT * FROM {qual} LIMIT {limit}")
-        rows = cur.fetchall()
-        cols = [d[0] for d in cur.description]
-    df = pd.DataFrame(rows, columns=cols)
-    for c in df.columns:
-        if df[c].dtype == object:
-            try:
-                df[c] = pd.to_numeric(df[c], errors="ignore")
-            except Exception:
-                pass
-        if df[c].dtype == object and df[c].dropna().astype(str).str.match(r"^\d{4}-\d{2}-\d{2}").any():
-            try:
-                df[c] = pd.to_datetime(df[c], errors="coerce")
-            except Exception:
-                pass
-    return df
+            cur.execute(_with_limit("SELECT * FROM IDENTIFIER(%s)", limit), (qual,))
+        df = _fetch_df(cur)
+    return _coerce_object_columns(df)
+
+
+def _norm_upper(series):
+    """series.astype(str).str.upper().str.strip(), with the string work done once per distinct value (status and type
+    columns hold a handful) via categorical codes instead of once per row. Missing values stay NaN on every pandas
+    version (astype(str) would make them "nan"/"None" text on pandas < 3): the categorical is built before any str
+    conversion, so their code is -1, which indexes the NaN appended after the labels instead of the last category."""
+    cat = series.astype("category")
+    labels = np.append(cat.cat.categories.astype(str).str.upper().str.strip().to_numpy(dtype=object), np.nan)
+    return pd.Series(labels[cat.cat.codes.to_numpy()], index=series.index)
+
+
+def load_table_qualified(conn, database: str, schema: str, table: str, limit=MAX_ROWS, date_col=None, from_date=None, to_date=None):
+    """Load table by fully qualified name. Optional date filter: date_col between from_date and to_date (inclusive).
+    Cached for _TABLE_TTL_SECONDS; errors are raised, not cached."""
+    if not (date_col and from_date is not None and to_date is not None):
+        date_col = from_date = to_date = None
+    return _cached_table_qualified(conn, database, schema, table, limit, date_col, from_date, to_date)
 
 
 INSTALMENT_PLANS_TODAY_SQL = """
@@ -669,7 +967,6 @@ def load_instalment_plans_for_period(conn, from_date, to_date, limit=5000):
     """Plans created in the given date range (by CREATED_AT). Same columns as today query. Use for merchant risk so counts reflect selected period (e.g. past month), not just today."""
     if conn is None or from_date is None or to_date is None:
         return None
-    fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
     sql = """
     SELECT ip.id AS instalment_plan_id, ip.consumer_profile_id, ip.client_name, ip.quantity,
            c.first_name, c.last_name, c.email, ip.agreement_number_of_instalments,
@@ -679,22 +976,14 @@ def load_instalment_plans_for_period(conn, from_date, to_date, limit=5000):
     LEFT JOIN CDC_CREDITMASTER_PRODUCTION.PUBLIC.credit_entity AS ce ON ce.id = c.credit_check_id
     LEFT JOIN CDC_CREDITMASTER_PRODUCTION.PUBLIC.credit_balance AS cb ON cb.credit_entity_id = ce.id
     LEFT JOIN CDC_CREDITMASTER_PRODUCTION.PUBLIC.experian_result AS er ON er.credit_entity_id = ce.id
-    WHERE (ip.status = 'ACTIVE' OR ip.status = 'COMPLETED') AND DATE(ip.created_at) >= %s AND DATE(ip.created_at) <= %s
+    WHERE (ip.status = 'ACTIVE' OR ip.status = 'COMPLETED') AND ip.created_at >= %s AND ip.created_at < %s
     ORDER BY ip.created_at DESC
     """
     try:
         with conn.cursor() as cur:
-            cur.execute(sql + f" LIMIT {limit}", (fd, td))
-            rows = cur.fetchall()
-            cols = [d[0] for d in cur.description]
-        df = pd.DataFrame(rows, columns=cols)
-        for c in df.columns:
-            if df[c].dtype == object:
-                try:
-                    df[c] = pd.to_numeric(df[c], errors="ignore")
-                except Exception:
-                    pass
-        return df
+            cur.execute(_with_limit(sql, limit), _date_params(from_date, to_date))
+            df = _fetch_df(cur)
+        return _coerce_object_columns(df, parse_dates=False)
     except Exception:
         return None
 
@@ -705,21 +994,45 @@ def load_instalment_plans_created_today(conn, limit=500):
         return None
     try:
         with conn.cursor() as cur:
-            cur.execute(INSTALMENT_PLANS_TODAY_SQL + f" LIMIT {limit}")
-            rows = cur.fetchall()
-            cols = [d[0] for d in cur.description]
-        df = pd.DataFrame(rows, columns=cols)
-        for c in df.columns:
-            if df[c].dtype == object:
-                try:
-                    df[c] = pd.to_numeric(df[c], errors="ignore")
-                except Exception:
-                    pass
-        return df
+            cur.execute(_with_limit(INSTALMENT_PLANS_TODAY_SQL, limit))
+            df = _fetch_df(cur)
+        return _coerce_object_columns(df, parse_dates=False)
     except Exception:
         return None
 
 
+_PLANS_TTL_SECONDS = 300
+
+
+@st.cache_data(ttl=_PLANS_TTL_SECONDS, show_spinner=False)
+def _cached_instalment_plans(_conn, from_date=None, to_date=None):
+    """Plans for the period (today's plans when no range or the period query fails), memoized so reruns reuse the
+    DataFrame instead of repeating the four-way plan/consumer/credit join."""
+    df = load_instalment_plans_for_period(_conn, from_date, to_date) if (from_date and to_date) else None
+    if df is None:
+        df = load_instalment_plans_created_today(_conn)
+    return df
+
+
+# Instalment columns the overdue renderers read (amount, due date, status); penalty/fee columns are added per schema.
+_OVERDUE_INSTALMENT_COLUMNS = ("ID", "INSTALMENT_PLAN_ID", "STATUS", "NEXT_EXECUTION_DATE", "QUANTITY", "AMOUNT", "CREATED_AT")
+
+
+def _is_penalty_column(name):
+    name = str(name).upper()
+    return any(x in name for x in ("PENALTY", "LATE_FEE", "FEE", "LATE_CHARGE")) and "REASON" not in name and "STATUS" not in name
+
+
+def _overdue_instalments_sql(columns=None):
+    """OVERDUE_INSTALMENTS_SQL projected to the columns the dashboard uses, given INSTALMENT's column list; i.* without it."""
+    projection = "i.*"
+    if columns:
+        keep = [c for c in columns if str(c).upper() in _OVERDUE_INSTALMENT_COLUMNS or _is_penalty_column(c)]
+        if keep:
+            projection = ", ".join(f"i.{quote_id(c)}" for c in keep)
+    return OVERDUE_INSTALMENTS_SQL.replace("i.*", projection, 1)
+
+
 OVERDUE_INSTALMENTS_SQL = """
 SELECT i.*, cp.first_name, cp.last_name, cp.email
 FROM CDC_BNPL_PRODUCTION.PUBLIC.instalment AS i
@@ -740,7 +1053,7 @@ SELECT ip.CONSUMER_PROFILE_ID AS client_id,
        (SELECT COUNT(*) FROM CDC_BNPL_PRODUCTION.PUBLIC.collection_attempt_instalment_link cail WHERE cail.instalment_id = i.id) AS retries
 FROM CDC_BNPL_PRODUCTION.PUBLIC.instalment i
 LEFT JOIN CDC_BNPL_PRODUCTION.PUBLIC.instalment_plan ip ON ip.id = i.instalment_plan_id
-WHERE i.next_execution_date IS NOT NULL AND (UPPER(TRIM(COALESCE(i.STATUS,''))) IN ('PENDING','OVERDUE'))
+WHERE i.next_execution_date IS NOT NULL AND (COALESCE(i.STATUS, '') COLLATE 'en-ci-trim' IN ('PENDING','OVERDUE'))
 ORDER BY i.next_execution_date ASC
 """
 
@@ -774,28 +1087,30 @@ WHERE cp.frozen = TRUE
 """
 
 KYC_REJECTS_SQL = """
-SELECT cp.first_name, cp.last_name, cp.kyc_status, vr.raw_response, cp.identity_number
+SELECT cp.first_name, cp.last_name, cp.kyc_status, cp.identity_number
 FROM CDC_VERIFICATION_MASTER_PRODUCTION.PUBLIC.verification_result AS vr
 LEFT JOIN CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.consumer_profile AS cp ON cp.identity_number = vr.identity_number
 WHERE cp.kyc_status = 'not_verified'
 """
 
+# Status/type predicates compare with COLLATE 'en-ci-trim' (case- and whitespace-insensitive, as UPPER(TRIM(col)) was)
+# so the bare column is compared and Snowflake can use its min/max metadata instead of normalising every row.
 # Rejected = consumers with CREDIT_CHECK_STATUS = 'rejected'. Optional date filter on CREATED_AT for funnel consistency.
 def _rejected_count_sql(from_date=None, to_date=None):
     excl = _excl_cp()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_cp(bound=True)
         return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT 1 FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE AS cp
-  WHERE UPPER(TRIM(cp.CREDIT_CHECK_STATUS)) = 'REJECTED'
-  AND DATE(cp.CREATED_AT) >= '{fd}' AND DATE(cp.CREATED_AT) <= '{td}'{excl}
+  WHERE cp.CREDIT_CHECK_STATUS COLLATE 'en-ci-trim' = 'REJECTED'
+  AND cp.CREATED_AT >= %s AND cp.CREATED_AT < %s{excl}
 ) t
-"""
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT 1 FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE AS cp
-  WHERE UPPER(TRIM(cp.CREDIT_CHECK_STATUS)) = 'REJECTED'{excl}
+  WHERE cp.CREDIT_CHECK_STATUS COLLATE 'en-ci-trim' = 'REJECTED'{excl}
 ) t
 """
 
@@ -803,15 +1118,15 @@ SELECT COUNT(*) AS n FROM (
 def _approved_count_sql(from_date=None, to_date=None):
     excl = _excl_cp()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_cp(bound=True)
         return f"""
 SELECT COUNT(*) AS n FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE
-WHERE UPPER(TRIM(CREDIT_CHECK_STATUS)) != 'REJECTED'
-AND DATE(CREATED_AT) >= '{fd}' AND DATE(CREATED_AT) <= '{td}'{excl}
-"""
+WHERE CREDIT_CHECK_STATUS COLLATE 'en-ci-trim' != 'REJECTED'
+AND CREATED_AT >= %s AND CREATED_AT < %s{excl}
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COUNT(*) AS n FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE
-WHERE UPPER(TRIM(CREDIT_CHECK_STATUS)) != 'REJECTED'{excl}
+WHERE CREDIT_CHECK_STATUS COLLATE 'en-ci-trim' != 'REJECTED'{excl}
 """
 
 KYC_REJECTS_COUNT_SQL = """
@@ -827,47 +1142,56 @@ SELECT COUNT(*) AS n FROM (
 def _kyc_verified_count_sql(from_date=None, to_date=None):
     excl = _excl_cp()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_cp(bound=True)
         return f"""
 SELECT COUNT(*) AS n FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE
-WHERE UPPER(TRIM(kyc_status)) IN ('VERIFIED', 'COMPLETE', 'SUCCESS')
-AND DATE(CREATED_AT) >= '{fd}' AND DATE(CREATED_AT) <= '{td}'{excl}
-"""
+WHERE kyc_status COLLATE 'en-ci-trim' IN ('VERIFIED', 'COMPLETE', 'SUCCESS')
+AND CREATED_AT >= %s AND CREATED_AT < %s{excl}
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COUNT(*) AS n FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE
-WHERE UPPER(TRIM(kyc_status)) IN ('VERIFIED', 'COMPLETE', 'SUCCESS'){excl}
+WHERE kyc_status COLLATE 'en-ci-trim' IN ('VERIFIED', 'COMPLETE', 'SUCCESS'){excl}
 """
 
 # CREDIT_POLICY_TRACE: FINAL_DECISION = 'REJECT', RULES = JSON array with 'reason' (rejection trigger: 'Credit application rejected by rules: RULE_NAME')
+# Flattened and counted in Snowflake: one row per rejection reason (rule name with the prefix stripped), most frequent first.
 CREDIT_POLICY_TRACE_REJECTIONS_SQL = """
-SELECT cpt.id, cpt.credit_entity_id, cpt.final_decision, cpt.rules
-FROM CDC_CREDITMASTER_PRODUCTION.PUBLIC.credit_policy_trace AS cpt
-INNER JOIN CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.consumer_profile AS cp ON cp.credit_check_id = cpt.credit_entity_id
-WHERE cp.credit_check_status = 'rejected' AND UPPER(TRIM(cpt.final_decision)) = 'REJECT'
+SELECT COALESCE(NULLIF(TRIM(IFF(STARTSWITH(r.reason, 'Credit application rejected by rules: '), SUBSTR(r.reason, 39), r.reason)), ''), r.reason) AS reason,
+  COUNT(*) AS cnt
+FROM (
+  SELECT f.value:reason::string AS reason
+  FROM CDC_CREDITMASTER_PRODUCTION.PUBLIC.credit_policy_trace AS cpt
+  INNER JOIN CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.consumer_profile AS cp ON cp.credit_check_id = cpt.credit_entity_id,
+  LATERAL FLATTEN(input => TRY_PARSE_JSON(TO_VARCHAR(cpt.rules))) f
+  WHERE cp.credit_check_status = 'rejected' AND cpt.final_decision COLLATE 'en-ci-trim' = 'REJECT'
+    AND STARTSWITH(f.value:reason::string, 'Credit application rejected')
+) r
+GROUP BY 1
+ORDER BY 2 DESC
 """
 
 # Applied = signups (CONSUMER_PROFILE rows). Optional date filter on CREATED_AT.
 def _applied_count_sql(from_date=None, to_date=None):
     excl = _excl_cp()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_cp(bound=True)
         return f"""
 SELECT COUNT(*) AS n FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE
-WHERE DATE(CREATED_AT) >= '{fd}' AND DATE(CREATED_AT) <= '{td}'{excl}
-"""
+WHERE CREATED_AT >= %s AND CREATED_AT < %s{excl}
+""", _date_params(from_date, to_date)
     return "SELECT COUNT(*) AS n FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE WHERE 1=1" + excl
 
 # Consumers with at least one plan (any status). Optional date filter on plan CREATED_AT.
 def _consumers_with_plan_count_sql(from_date=None, to_date=None):
     excl = _excl_plan()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_plan(bound=True)
         return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT DISTINCT CONSUMER_PROFILE_ID FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN
-  WHERE DATE(CREATED_AT) >= '{fd}' AND DATE(CREATED_AT) <= '{td}'{excl}
+  WHERE CREATED_AT >= %s AND CREATED_AT < %s{excl}
 ) t
-"""
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT DISTINCT CONSUMER_PROFILE_ID FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN
@@ -880,21 +1204,56 @@ SELECT COUNT(*) AS n FROM (
 def _activated_from_plans_sql(from_date=None, to_date=None):
     excl = _excl_plan()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_plan(bound=True)
         return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT DISTINCT CONSUMER_PROFILE_ID FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN
-  WHERE UPPER(TRIM(STATUS)) IN ('ACTIVE','COMPLETED')
-  AND DATE(CREATED_AT) >= '{fd}' AND DATE(CREATED_AT) <= '{td}'{excl}
+  WHERE STATUS COLLATE 'en-ci-trim' IN ('ACTIVE','COMPLETED')
+  AND CREATED_AT >= %s AND CREATED_AT < %s{excl}
 ) t
-"""
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT DISTINCT CONSUMER_PROFILE_ID FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN
-  WHERE UPPER(TRIM(STATUS)) IN ('ACTIVE','COMPLETED'){excl}
+  WHERE STATUS COLLATE 'en-ci-trim' IN ('ACTIVE','COMPLETED'){excl}
 ) t
 """
 
+# Fused funnel counts: one CONSUMER_PROFILE scan instead of four (applied / approved / rejected / kyc_verified).
+# The predicates match _applied_count_sql, _approved_count_sql, _rejected_count_sql and _kyc_verified_count_sql.
+def _consumer_funnel_counts_sql(from_date=None, to_date=None):
+    excl = _excl_cp()
+    date_filter, params = "", None
+    if from_date is not None and to_date is not None:
+        excl = _excl_cp(bound=True)
+        date_filter, params = " AND CREATED_AT >= %s AND CREATED_AT < %s", _date_params(from_date, to_date)
+    return f"""
+SELECT
+  COUNT(*) AS applied,
+  COUNT(CASE WHEN CREDIT_CHECK_STATUS COLLATE 'en-ci-trim' != 'REJECTED' THEN 1 END) AS approved,
+  COUNT(CASE WHEN CREDIT_CHECK_STATUS COLLATE 'en-ci-trim' = 'REJECTED' THEN 1 END) AS rejected,
+  COUNT(CASE WHEN kyc_status COLLATE 'en-ci-trim' IN ('VERIFIED', 'COMPLETE', 'SUCCESS') THEN 1 END) AS kyc_verified
+FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE
+WHERE 1=1{date_filter}{excl}
+""", params
+
+# Fused INSTALMENT_PLAN counts: all-time and in-period consumers with a plan, and in-period activated consumers.
+# The period is applied inside the CASE so the all-time count shares the same scan.
+def _plan_funnel_counts_sql(from_date=None, to_date=None):
+    excl = _excl_plan()
+    in_period, params = "TRUE", None
+    if from_date is not None and to_date is not None:
+        excl = _excl_plan(bound=True)
+        in_period, params = "CREATED_AT >= %s AND CREATED_AT < %s", _date_params(from_date, to_date) * 2
+    return f"""
+SELECT
+  COUNT(DISTINCT CONSUMER_PROFILE_ID) AS consumers_with_plan_all,
+  COUNT(DISTINCT CASE WHEN {in_period} THEN CONSUMER_PROFILE_ID END) AS consumers_with_plan,
+  COUNT(DISTINCT CASE WHEN {in_period} AND STATUS COLLATE 'en-ci-trim' IN ('ACTIVE','COMPLETED') THEN CONSUMER_PROFILE_ID END) AS activated
+FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN
+WHERE 1=1{excl}
+""", params
+
 # Plan creation (proxy) = distinct consumers with at least one COLLECTION_ATTEMPT where TYPE = 'INITIAL' (any status).
 # So "reached payment step" / "attempted first payment" — since INSTALMENT_PLAN may only be created after payment,
 # we use "had an initial attempt" as proxy for "was presented with plan and proceeded to payment".
@@ -902,7 +1261,7 @@ SELECT COUNT(*) AS n FROM (
 def _plan_creation_from_attempts_sql(from_date=None, to_date=None):
     excl = _excl_plan()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_plan(bound=True)
         return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT DISTINCT ip.CONSUMER_PROFILE_ID
@@ -910,10 +1269,10 @@ SELECT COUNT(*) AS n FROM (
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.COLLECTION_ATTEMPT_INSTALMENT_LINK cal ON cal.COLLECTION_ATTEMPT_ID = ca.ID
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT i ON i.ID = cal.INSTALMENT_ID
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN ip ON ip.ID = i.INSTALMENT_PLAN_ID
-  WHERE UPPER(TRIM(ca.TYPE)) = 'INITIAL'
-  AND DATE(COALESCE(ca.EXECUTED_AT, ca.CREATED_AT)) >= '{fd}' AND DATE(COALESCE(ca.EXECUTED_AT, ca.CREATED_AT)) <= '{td}'{excl}
+  WHERE ca.TYPE COLLATE 'en-ci-trim' = 'INITIAL'
+  AND COALESCE(ca.EXECUTED_AT, ca.CREATED_AT) >= %s AND COALESCE(ca.EXECUTED_AT, ca.CREATED_AT) < %s{excl}
 ) t
-"""
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT DISTINCT ip.CONSUMER_PROFILE_ID
@@ -921,7 +1280,7 @@ SELECT COUNT(*) AS n FROM (
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.COLLECTION_ATTEMPT_INSTALMENT_LINK cal ON cal.COLLECTION_ATTEMPT_ID = ca.ID
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT i ON i.ID = cal.INSTALMENT_ID
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN ip ON ip.ID = i.INSTALMENT_PLAN_ID
-  WHERE UPPER(TRIM(ca.TYPE)) = 'INITIAL'{excl}
+  WHERE ca.TYPE COLLATE 'en-ci-trim' = 'INITIAL'{excl}
 ) t
 """
 
@@ -930,7 +1289,7 @@ SELECT COUNT(*) AS n FROM (
 def _initial_collection_count_sql(from_date=None, to_date=None):
     excl = _excl_plan()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_plan(bound=True)
         return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT DISTINCT ip.CONSUMER_PROFILE_ID
@@ -938,10 +1297,10 @@ SELECT COUNT(*) AS n FROM (
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.COLLECTION_ATTEMPT_INSTALMENT_LINK cal ON cal.COLLECTION_ATTEMPT_ID = ca.ID
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT i ON i.ID = cal.INSTALMENT_ID
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN ip ON ip.ID = i.INSTALMENT_PLAN_ID
-  WHERE UPPER(TRIM(ca.TYPE)) = 'INITIAL' AND UPPER(TRIM(ca.STATUS)) = 'COMPLETED'
-  AND DATE(COALESCE(ca.EXECUTED_AT, ca.CREATED_AT)) >= '{fd}' AND DATE(COALESCE(ca.EXECUTED_AT, ca.CREATED_AT)) <= '{td}'{excl}
+  WHERE ca.TYPE COLLATE 'en-ci-trim' = 'INITIAL' AND ca.STATUS COLLATE 'en-ci-trim' = 'COMPLETED'
+  AND COALESCE(ca.EXECUTED_AT, ca.CREATED_AT) >= %s AND COALESCE(ca.EXECUTED_AT, ca.CREATED_AT) < %s{excl}
 ) t
-"""
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COUNT(*) AS n FROM (
   SELECT DISTINCT ip.CONSUMER_PROFILE_ID
@@ -949,39 +1308,140 @@ SELECT COUNT(*) AS n FROM (
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.COLLECTION_ATTEMPT_INSTALMENT_LINK cal ON cal.COLLECTION_ATTEMPT_ID = ca.ID
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT i ON i.ID = cal.INSTALMENT_ID
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN ip ON ip.ID = i.INSTALMENT_PLAN_ID
-  WHERE UPPER(TRIM(ca.TYPE)) = 'INITIAL' AND UPPER(TRIM(ca.STATUS)) = 'COMPLETED'{excl}
+  WHERE ca.TYPE COLLATE 'en-ci-trim' = 'INITIAL' AND ca.STATUS COLLATE 'en-ci-trim' = 'COMPLETED'{excl}
 ) t
 """
 
 
-def _run_query_df(conn, sql, limit=500):
-    """Run SQL and return DataFrame or None."""
+# Independent panel queries are dominated by Snowflake round-trip time, so they are fanned out (pool or execute_async).
+_QUERY_WORKERS = 8
+_QUERY_TIMEOUT_SECONDS = 120
+
+
+def _submit_async(cur, sql, params=None):
+    """Submit sql without waiting for it; returns the Snowflake query id."""
+    cur.execute_async(sql, params)
+    return cur.sfqid
+
+
+def await_result(conn, sfqid, timeout=_QUERY_TIMEOUT_SECONDS):
+    """Poll an async query with exponential backoff and return its rows, or None on error/timeout."""
+    if conn is None or not sfqid:
+        return None
+    try:
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        status = conn.get_query_status(sfqid)
+        while conn.is_still_running(status):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+            status = conn.get_query_status(sfqid)
+        if conn.is_an_error(status):
+            return None
+        with conn.cursor() as cur:
+            cur.get_results_from_sfqid(sfqid)
+            return cur.fetchall()
+    except Exception:
+        return None
+
+
+# Query results are idempotent for a given SQL text and bind params, so every rerun within the TTL reuses them.
+# The store is a lock-guarded dict held by st.cache_resource, not st.cache_data: run_parallel calls the undecorated
+# helpers from worker threads (no ScriptRunContext), and does the lookups and stores itself on the script thread.
+_RESULT_TTL_SECONDS = 300
+_RESULT_CACHE_MAX = 256
+
+
+class _NoResult(Exception):
+    """Raised out of an st.cache_data function for a failed load: exceptions are not cached, so failures are retried."""
+
+
+@st.cache_resource(show_spinner=False)
+def _result_store():
+    """Process-wide {"lock", "entries": {key: (expires_at, value)}} for _cached_result; survives reruns."""
+    return {"lock": threading.Lock(), "entries": {}}
+
+
+def _result_key(fn, query, args=(), kwargs=None):
+    sql, params = _split_query(query)
+    if isinstance(params, list):
+        params = tuple(params)
+    return fn.__name__, sql, params, args, tuple(sorted((kwargs or {}).items()))
+
+
+def _result_get(store, key):
+    """Cached value for key (a copy for DataFrames/dicts, so callers can mutate it), or None when absent or expired."""
+    with store["lock"]:
+        hit = store["entries"].get(key)
+    if hit is None or hit[0] <= time.monotonic():
+        return None
+    return _result_copy(hit[1])
+
+
+def _result_copy(value):
+    return value.copy() if isinstance(value, (pd.DataFrame, dict)) else value
+
+
+def _result_put(store, key, value):
+    """Remember value for _RESULT_TTL_SECONDS, evicting the oldest entry when full. Failures (None) are not stored."""
+    if value is None:
+        return
+    with store["lock"]:
+        entries = store["entries"]
+        if key not in entries and len(entries) >= _RESULT_CACHE_MAX:
+            entries.pop(next(iter(entries)))
+        entries[key] = (time.monotonic() + _RESULT_TTL_SECONDS, value)
+
+
+def _cached_result(fn):
+    """Memoize a _run_* helper in _result_store on (helper, sql, params, extra args) for _RESULT_TTL_SECONDS. Failures
+    (None) and async submissions are not cached. The undecorated helper stays reachable as __wrapped__ for run_parallel."""
+    @wraps(fn)
+    def wrapper(conn, query, *args, async_mode=False, **kwargs):
+        if async_mode:
+            return fn(conn, query, *args, async_mode=True, **kwargs)
+        if conn is None:
+            return None
+        store, key = _result_store(), _result_key(fn, query, args, kwargs)
+        value = _result_get(store, key)
+        if value is None:
+            value = fn(conn, query, *args, **kwargs)
+            _result_put(store, key, value)
+            value = _result_copy(value)
+        return value
+    return wrapper
+
+
+@_cached_result
+def _run_query_df(conn, query, limit=500, async_mode=False):
+    """Run SQL (or a (sql, params) pair) and return DataFrame or None. With async_mode=True, submit it and return the query id instead."""
     if conn is None:
         return None
+    sql, params = _split_query(query)
     try:
         with conn.cursor() as cur:
-            cur.execute(sql + f" LIMIT {limit}")
-            rows = cur.fetchall()
-            cols = [d[0] for d in cur.description]
-        df = pd.DataFrame(rows, columns=cols)
-        for c in df.columns:
-            if df[c].dtype == object:
-                try:
-                    df[c] = pd.to_numeric(df[c], errors="ignore")
-                except Exception:
-                    pass
-        return df
+            if async_mode:
+                return _submit_async(cur, _with_limit(sql, limit), params)
+            cur.execute(_with_limit(sql, limit), params)
+            df = _fetch_df(cur)
+        return _coerce_object_columns(df, parse_dates=False)
     except Exception:
         return None
 
 
-def _run_count(conn, sql):
-    """Run a SELECT COUNT(*) query and return the count as int, or None on failure."""
+@_cached_result
+def _run_count(conn, query, async_mode=False):
+    """Run a SELECT COUNT(*) query (plain SQL or a (sql, params) pair) and return the count as int, or None on failure. With async_mode=True, submit it and return the query id instead."""
     if conn is None:
         return None
+    sql, params = _split_query(query)
     try:
         with conn.cursor() as cur:
-            cur.execute(sql)
+            if async_mode:
+                return _submit_async(cur, sql, params)
+            cur.execute(sql, params)
             row = cur.fetchone()
         if row and len(row) > 0 and row[0] is not None:
             return int(row[0])
@@ -990,13 +1450,17 @@ def _run_count(conn, sql):
         return None
 
 
-def _run_scalar(conn, sql):
-    """Run a single-value query (e.g. SELECT SUM(...)) and return the value as float, or None on failure."""
+@_cached_result
+def _run_scalar(conn, query, async_mode=False):
+    """Run a single-value query (e.g. SELECT SUM(...)) (plain SQL or a (sql, params) pair) and return the value as float, or None on failure. With async_mode=True, submit it and return the query id instead."""
     if conn is None:
         return None
+    sql, params = _split_query(query)
     try:
         with conn.cursor() as cur:
-            cur.execute(sql)
+            if async_mode:
+                return _submit_async(cur, sql, params)
+            cur.execute(sql, params)
             row = cur.fetchone()
         if row and len(row) > 0 and row[0] is not None:
             return float(row[0])
@@ -1005,8 +1469,76 @@ def _run_scalar(conn, sql):
         return None
 
 
+@_cached_result
+def _run_row(conn, query, cast=int):
+    """Run a one-row query (plain SQL or a (sql, params) pair) and return {lowercase column name: cast(value)} (None per
+    column when NULL), or None on failure."""
+    if conn is None:
+        return None
+    sql, params = _split_query(query)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            cols = [d[0].lower() for d in cur.description]
+            row = cur.fetchone()
+        if not row:
+            return None
+        return {c: cast(v) if v is not None else None for c, v in zip(cols, row)}
+    except Exception:
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def _query_executor():
+    """Process-wide thread pool for concurrent Snowflake queries (the connector is thread-safe; one cursor per query)."""
+    return ThreadPoolExecutor(max_workers=_QUERY_WORKERS, thread_name_prefix="snowflake-query")
+
+
+def run_parallel(conn, queries, runner=_run_query_df):
+    """Run independent queries concurrently. queries: {name: query or (runner, query)} where query is SQL or a (sql, params)
+    pair; runner is _run_query_df, _run_count, _run_scalar or _run_row. Returns {name: result}; a query that fails or is
+    still running after _QUERY_TIMEOUT_SECONDS maps to None."""
+    if conn is None or not queries:
+        return {name: None for name in queries}
+    executor = _query_executor()
+    # Cache lookups and stores happen here on the script thread; workers only run the undecorated helpers on misses.
+    store = _result_store()
+    results, futures, keys = {}, {}, {}
+    for name, q in queries.items():
+        fn, query = q if isinstance(q, tuple) and callable(q[0]) else (runner, q)
+        raw = getattr(fn, "__wrapped__", None)
+        if raw is None:
+            futures[name] = executor.submit(fn, conn, query)
+            continue
+        keys[name] = _result_key(raw, query)
+        results[name] = _result_get(store, keys[name])
+        if results[name] is None:
+            futures[name] = executor.submit(raw, conn, query)
+    done, not_done = wait(futures.values(), timeout=_QUERY_TIMEOUT_SECONDS)
+    for fut in not_done:
+        fut.cancel()
+    for name, fut in futures.items():
+        results[name] = fut.result() if fut in done else None
+        if name in keys:
+            _result_put(store, keys[name], results[name])
+            results[name] = _result_copy(results[name])
+    return {name: results[name] for name in queries}
+
+
+def run_async_scalars(conn, queries):
+    """Submit every single-value query with execute_async, then await them all, so K queries cost ~1 round-trip.
+    queries: {name: sql or (sql, params)}. Returns {name: float or None}."""
+    sfqids = {name: _run_scalar(conn, query, async_mode=True) for name, query in queries.items()}
+    values = {}
+    for name, sfqid in sfqids.items():
+        rows = await_result(conn, sfqid)
+        values[name] = float(rows[0][0]) if rows and rows[0] and rows[0][0] is not None else None
+    return values
+
+
 def load_overdue_instalments(conn):
-    return _run_query_df(conn, OVERDUE_INSTALMENTS_SQL)
+    cols = get_table_columns(conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "INSTALMENT")
+    return _run_query_df(conn, _overdue_instalments_sql(cols))
 
 
 def load_bad_payers(conn, limit=500):
@@ -1016,13 +1548,10 @@ def load_bad_payers(conn, limit=500):
     df = _run_query_df(conn, _bad_payers_sql(), limit=limit)
     if df is None or df.empty:
         return None
-    today = date.today()
+    # OVERDUE_DAYS comes from Snowflake (GREATEST(0, DATEDIFF(...))); only the due date needs a dtype here.
     due_col = next((c for c in df.columns if str(c).upper() in ("DUE_DATE", "NEXT_EXECUTION_DATE")), None)
     if due_col:
-        df["due_date"] = pd.to_datetime(df[due_col], errors="coerce")
-        df["overdue_days"] = df["due_date"].apply(
-            lambda d: (today - d.date()).days if d is not None and hasattr(d, "date") and d.date() < today else 0
-        )
+        df[due_col] = pd.to_datetime(df[due_col], errors="coerce")
     return df
 
 
@@ -1091,23 +1620,23 @@ def load_consumers_with_plan_count(conn, from_date=None, to_date=None):
 
 def _loan_book_credit_limit_sql(from_date=None, to_date=None):
     """Total loaned = credit limit allocated to approved users. Excludes test users. Optional date filter on consumer CREATED_AT."""
-    excl = _excl_cp()
+    excl = _excl_cp(alias="cp")
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_cp(bound=True, alias="cp")
         return f"""
 SELECT COALESCE(SUM(cb.credit_limit), 0) AS total
 FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE cp
 LEFT JOIN CDC_CREDITMASTER_PRODUCTION.PUBLIC.credit_entity ce ON ce.id = cp.credit_check_id
 LEFT JOIN CDC_CREDITMASTER_PRODUCTION.PUBLIC.credit_balance cb ON cb.credit_entity_id = ce.id
-WHERE UPPER(TRIM(COALESCE(cp.CREDIT_CHECK_STATUS, ''))) != 'REJECTED' AND cb.credit_limit IS NOT NULL
-AND DATE(cp.CREATED_AT) >= '{fd}' AND DATE(cp.CREATED_AT) <= '{td}'{excl}
-"""
+WHERE COALESCE(cp.CREDIT_CHECK_STATUS, '') COLLATE 'en-ci-trim' != 'REJECTED' AND cb.credit_limit IS NOT NULL
+AND cp.CREATED_AT >= %s AND cp.CREATED_AT < %s{excl}
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COALESCE(SUM(cb.credit_limit), 0) AS total
 FROM CDC_CONSUMER_PROFILE_PRODUCTION.PUBLIC.CONSUMER_PROFILE cp
 LEFT JOIN CDC_CREDITMASTER_PRODUCTION.PUBLIC.credit_entity ce ON ce.id = cp.credit_check_id
 LEFT JOIN CDC_CREDITMASTER_PRODUCTION.PUBLIC.credit_balance cb ON cb.credit_entity_id = ce.id
-WHERE UPPER(TRIM(COALESCE(cp.CREDIT_CHECK_STATUS, ''))) != 'REJECTED' AND cb.credit_limit IS NOT NULL{excl}
+WHERE COALESCE(cp.CREDIT_CHECK_STATUS, '') COLLATE 'en-ci-trim' != 'REJECTED' AND cb.credit_limit IS NOT NULL{excl}
 """
 
 
@@ -1115,12 +1644,12 @@ def _loan_book_settled_sql(from_date=None, to_date=None):
     """Total settled to merchants fallback = sum of INSTALMENT_PLAN (QUANTITY, VALUE, AMOUNT, TOTAL_AMOUNT). Excludes test users."""
     excl = _excl_plan()
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        excl = _excl_plan(bound=True)
         return f"""
 SELECT COALESCE(SUM(COALESCE(ip.QUANTITY, ip.VALUE, ip.AMOUNT, ip.TOTAL_AMOUNT, 0)), 0) AS total
 FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN ip
-WHERE DATE(ip.CREATED_AT) >= '{fd}' AND DATE(ip.CREATED_AT) <= '{td}'{excl}
-"""
+WHERE ip.CREATED_AT >= %s AND ip.CREATED_AT < %s{excl}
+""", _date_params(from_date, to_date)
     return f"""
 SELECT COALESCE(SUM(COALESCE(ip.QUANTITY, ip.VALUE, ip.AMOUNT, ip.TOTAL_AMOUNT, 0)), 0) AS total
 FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN ip
@@ -1129,68 +1658,107 @@ WHERE 1=1{excl}
 
 
 def _loan_book_collected_sql(from_date=None, to_date=None):
-    """Total collected = sum of instalment amounts linked to successful (COMPLETED) collection attempts. Excludes test users via plan."""
+    """Total collected = sum of instalment amounts linked to successful (COMPLETED) collection attempts. Excludes test users via plan.
+    Uncorrelated IN (semi-join) so the completed-instalment set is built once and hash-joined."""
     excl = _excl_plan()
     base = """
 SELECT COALESCE(SUM(COALESCE(i.QUANTITY, i.AMOUNT, 0)), 0) AS total
 FROM CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT i
 INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.INSTALMENT_PLAN ip ON ip.ID = i.INSTALMENT_PLAN_ID
-WHERE EXISTS (
-  SELECT 1 FROM CDC_BNPL_PRODUCTION.PUBLIC.COLLECTION_ATTEMPT_INSTALMENT_LINK cail
+WHERE i.ID IN (
+  SELECT DISTINCT cail.INSTALMENT_ID FROM CDC_BNPL_PRODUCTION.PUBLIC.COLLECTION_ATTEMPT_INSTALMENT_LINK cail
   INNER JOIN CDC_BNPL_PRODUCTION.PUBLIC.COLLECTION_ATTEMPT ca ON ca.ID = cail.COLLECTION_ATTEMPT_ID
-  WHERE cail.INSTALMENT_ID = i.ID AND UPPER(TRIM(ca.STATUS)) = 'COMPLETED'
+  WHERE ca.STATUS COLLATE 'en-ci-trim' = 'COMPLETED'
 )"""
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
-        return base + f"\nAND DATE(i.CREATED_AT) >= '{fd}' AND DATE(i.CREATED_AT) <= '{td}'" + excl
+        return base + "\nAND i.CREATED_AT >= %s AND i.CREATED_AT < %s" + _excl_plan(bound=True), _date_params(from_date, to_date)
     return base + excl
 
 
+def _scalar_ctes(queries):
+    """(WITH clause, params) naming each single-value query in queries ({name: sql or (sql, params)}, each selecting a
+    column named total) as a CTE called name."""
+    ctes, params = [], []
+    for name, query in queries.items():
+        sql, p = _split_query(query)
+        ctes.append(f"{name} AS ({sql.strip()})")
+        params.extend(p or ())
+    return "WITH " + ",\n".join(ctes), tuple(params)
+
+
+def _combined_scalars_sql(queries):
+    """One statement returning every query in queries as a column called name, so all share one compile and round trip."""
+    with_clause, params = _scalar_ctes(queries)
+    sql = with_clause + "\nSELECT " + ", ".join(f"(SELECT total FROM {name}) AS {name}" for name in queries)
+    return (sql, params) if params else sql
+
+
+def _coalesced_scalars_sql(queries):
+    """One statement returning the first non-null total of queries, in dict order (0 when all are null), as total."""
+    with_clause, params = _scalar_ctes(queries)
+    sql = with_clause + "\nSELECT COALESCE(" + ", ".join(f"(SELECT total FROM {name})" for name in queries) + ", 0) AS total"
+    return (sql, params) if params else sql
+
+
 # Operations DB (CDC_OPERATIONS_PRODUCTION): BNPL TRANSACTION = settled to merchants; MERCHANT SETTLEMENT has settled_amount; BNPL CARD TRANSACTION = collections from cards.
 # Use schema discovery when fixed column names fail (table/column names may vary).
+def _sum_column_qualified_sql(database: str, schema: str, table: str, column: str, from_date=None, to_date=None, date_col_hint="CREATED_AT"):
+    """SELECT SUM(column) AS total FROM qualified table. Optional date filter on date_col_hint. Columns quoted for case/spaces."""
+    qual = _qualified(schema, table, database)
+    col_quoted = quote_id(column)
+    date_quoted = quote_id(date_col_hint)
+    if from_date is not None and to_date is not None:
+        pred, params = _date_range_predicate(date_quoted, from_date, to_date)
+        return f"SELECT COALESCE(SUM({col_quoted}), 0) AS total FROM {qual} WHERE {pred}", params
+    return f"SELECT COALESCE(SUM({col_quoted}), 0) AS total FROM {qual}"
+
+
 def _sum_column_qualified(conn, database: str, schema: str, table: str, column: str, from_date=None, to_date=None, date_col_hint="CREATED_AT"):
-    """Run SELECT SUM(column) FROM qualified table. Optional date filter on date_col_hint. Columns quoted for case/spaces. Returns float or None."""
+    """Run _sum_column_qualified_sql. Returns float or None."""
     if conn is None or not column:
         return None
-    qual = f'"{database}"."{schema}"."{table}"'
-    col_quoted = f'"{column}"'
-    date_quoted = f'"{date_col_hint}"'
-    if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
-        sql = f"SELECT COALESCE(SUM({col_quoted}), 0) AS total FROM {qual} WHERE DATE({date_quoted}) >= '{fd}' AND DATE({date_quoted}) <= '{td}'"
-    else:
-        sql = f"SELECT COALESCE(SUM({col_quoted}), 0) AS total FROM {qual}"
-    return _run_scalar(conn, sql)
+    return _run_scalar(conn, _sum_column_qualified_sql(database, schema, table, column, from_date, to_date, date_col_hint))
+
+
+# Known (amount column, date column) of the Operations tables behind 'total settled'; other tables are discovered.
+_OPERATIONS_SUM_COLUMNS = {
+    "BNPLTRANSACTION": ("QUANTITY", "CREATED_AT"),
+    "MERCHANT SETTLEMENT": ("SETTLED_AMOUNT", "CREATED_AT"),
+}
+
+
+def _discovered_sum_columns(conn, database: str, schema: str, table: str):
+    """(amount column, date column) of an Operations table: from _OPERATIONS_SUM_COLUMNS when known, else from its
+    discovered columns (first amount-like one, first date-like one, default CREATED_AT). (None, None) when the table has no columns."""
+    if table in _OPERATIONS_SUM_COLUMNS:
+        return _OPERATIONS_SUM_COLUMNS[table]
+    cols = get_table_columns(conn, database, schema, table)
+    amount_col = _first_amount_like_column(cols)
+    if not amount_col:
+        return None, None
+    date_candidates = [
+        c for c in cols if c and c != amount_col and any(x in str(c).upper() for x in ("CREATED", "DATE", "UPDATED", "SETTLED"))
+    ]
+    return amount_col, date_candidates[0] if date_candidates else "CREATED_AT"
 
 
 def _operations_settled_from_table(conn, database: str, schema: str, table: str, from_date=None, to_date=None):
-    """Get sum of amount-like column from an Operations table. Discovers columns and sums first amount-like one. Returns float or None."""
+    """Get sum of amount-like column from an Operations table (known columns, else discovered). One query; returns float
+    or None (the caller decides on a fallback)."""
     if conn is None:
         return None
-    cols = get_table_columns(conn, database, schema, table)
-    amount_col = _first_amount_like_column(cols)
+    amount_col, date_col = _discovered_sum_columns(conn, database, schema, table)
     if not amount_col:
         return None
-    date_candidates = [c for c in cols if c and any(x in str(c).upper() for x in ("CREATED", "DATE", "UPDATED", "SETTLED"))]
-    date_col = date_candidates[0] if date_candidates else "CREATED_AT"
-    use_date = from_date is not None and to_date is not None and date_col
-    v = _sum_column_qualified(
-        conn, database, schema, table, amount_col,
-        from_date if use_date else None, to_date if use_date else None,
-        date_col,
-    )
-    if v is not None:
-        return float(v)
-    v = _sum_column_qualified(conn, database, schema, table, amount_col, None, None, date_col)
-    return float(v) if v is not None else None
+    return _sum_column_qualified(conn, database, schema, table, amount_col, from_date, to_date, date_col)
 
 
 def _operations_bnpl_transaction_total_sql(from_date=None, to_date=None):
     """Sum of QUANTITY from BNPL TRANSACTION = amount settled to merchants."""
     qual = '"CDC_OPERATIONS_PRODUCTION"."PUBLIC"."BNPLTRANSACTION"'
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
-        return f"SELECT COALESCE(SUM(QUANTITY), 0) AS total FROM {qual} WHERE DATE(CREATED_AT) >= '{fd}' AND DATE(CREATED_AT) <= '{td}'"
+        pred, params = _date_range_predicate("CREATED_AT", from_date, to_date)
+        return f"SELECT COALESCE(SUM(QUANTITY), 0) AS total FROM {qual} WHERE {pred}", params
     return f"SELECT COALESCE(SUM(QUANTITY), 0) AS total FROM {qual}"
 
 
@@ -1198,8 +1766,8 @@ def _operations_merchant_settlement_total_sql(from_date=None, to_date=None):
     """Sum of SETTLED_AMOUNT from MERCHANT SETTLEMENT (alternative source for settled to merchants)."""
     qual = '"CDC_OPERATIONS_PRODUCTION"."PUBLIC"."MERCHANT SETTLEMENT"'
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
-        return f"SELECT COALESCE(SUM(SETTLED_AMOUNT), 0) AS total FROM {qual} WHERE DATE(CREATED_AT) >= '{fd}' AND DATE(CREATED_AT) <= '{td}'"
+        pred, params = _date_range_predicate("CREATED_AT", from_date, to_date)
+        return f"SELECT COALESCE(SUM(SETTLED_AMOUNT), 0) AS total FROM {qual} WHERE {pred}", params
     return f"SELECT COALESCE(SUM(SETTLED_AMOUNT), 0) AS total FROM {qual}"
 
 
@@ -1207,8 +1775,8 @@ def _operations_bnpl_card_transaction_total_sql(from_date=None, to_date=None):
     """Sum of QUANTITY from BNPLCARDTRANSACTION = what we have collected from users (instalment collections from cards)."""
     qual = '"CDC_OPERATIONS_PRODUCTION"."PUBLIC"."BNPLCARDTRANSACTION"'
     if from_date is not None and to_date is not None:
-        fd, td = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
-        return f"SELECT COALESCE(SUM(QUANTITY), 0) AS total FROM {qual} WHERE DATE(CREATED_AT) >= '{fd}' AND DATE(CREATED_AT) <= '{td}'"
+        pred, params = _date_range_predicate("CREATED_AT", from_date, to_date)
+        return f"SELECT COALESCE(SUM(QUANTITY), 0) AS total FROM {qual} WHERE {pred}", params
     return f"SELECT COALESCE(SUM(QUANTITY), 0) AS total FROM {qual}"
 
 
@@ -1226,25 +1794,23 @@ def load_operations_merchant_settlement_total(conn, from_date=None, to_date=None
     return _run_scalar(conn, _operations_merchant_settlement_total_sql(from_date, to_date))
 
 
-def _resolve_total_settled(conn, from_date=None, to_date=None):
-    """Resolve 'total settled to merchants': try Operations (discovery then fixed SQL for BNPL TRANSACTION / MERCHANT SETTLEMENT), then INSTALMENT_PLAN. Returns float."""
-    db, schema = "CDC_OPERATIONS_PRODUCTION", "PUBLIC"
-    # 1) Discovery-based: read table columns and sum first amount-like column
-    v = _operations_settled_from_table(conn, db, schema, "BNPLTRANSACTION", from_date, to_date)
-    if v is not None:
-        return float(v)
-    v = _operations_settled_from_table(conn, db, schema, "MERCHANT SETTLEMENT", from_date, to_date)
-    if v is not None:
-        return float(v)
-    # 2) Fixed SQL (known column names)
-    v = load_operations_settled_to_merchants(conn, from_date, to_date)
-    if v is not None:
-        return float(v)
-    v = load_operations_merchant_settlement_total(conn, from_date, to_date)
-    if v is not None:
-        return float(v)
-    # 3) INSTALMENT_PLAN fallback
-    v = _run_scalar(conn, _loan_book_settled_sql(from_date, to_date))
+# _loan_book_queries names of the 'total settled to merchants' sources, in the order _resolve_total_settled tries them.
+_TOTAL_SETTLED_PRIORITY = ("operations_settled", "merchant_settlement", "plan_settled")
+
+
+def _resolve_total_settled(conn, from_date=None, to_date=None, candidates=None):
+    """Resolve 'total settled to merchants': try Operations (BNPL TRANSACTION, then MERCHANT SETTLEMENT), then INSTALMENT_PLAN.
+    With candidates ({name: value} already fetched for _loan_book_queries) the first non-null in _TOTAL_SETTLED_PRIORITY is
+    used without querying again. Otherwise one COALESCE statement picks it; if a source table is missing (the statement
+    fails) the candidate sums are run concurrently instead (run_parallel). Returns float."""
+    if candidates is None:
+        queries = _loan_book_queries(conn, from_date, to_date)
+        queries = {k: queries[k] for k in _TOTAL_SETTLED_PRIORITY if k in queries}
+        v = _run_scalar(conn, _coalesced_scalars_sql(queries))
+        if v is not None:
+            return v
+        candidates = run_parallel(conn, queries, runner=_run_scalar)
+    v = next((candidates[k] for k in _TOTAL_SETTLED_PRIORITY if candidates.get(k) is not None), None)
     return float(v) if v is not None else 0.0
 
 
@@ -1255,29 +1821,101 @@ def load_operations_collections_from_cards(conn, from_date=None, to_date=None):
     return _run_scalar(conn, _operations_bnpl_card_transaction_total_sql(from_date, to_date))
 
 
+def _credit_allocated_sql():
+    qual = '"CDC_CREDITMASTER_PRODUCTION"."PUBLIC"."CREDIT_BALANCE"'
+    return f"SELECT COALESCE(SUM(CREDIT_LIMIT), 0) AS total FROM {qual}"
+
+
 def load_credit_allocated(conn):
     """Credit allocated = sum of CREDIT_LIMIT from CDC_CREDITMASTER_PRODUCTION.PUBLIC.CREDIT_BALANCE. Allocated to users, not necessarily consumed yet. Returns float or None on error."""
     if conn is None:
         return None
-    qual = '"CDC_CREDITMASTER_PRODUCTION"."PUBLIC"."CREDIT_BALANCE"'
-    return _run_scalar(conn, f"SELECT COALESCE(SUM(CREDIT_LIMIT), 0) AS total FROM {qual}")
+    return _run_scalar(conn, _credit_allocated_sql())
+
+
+# Columns of build_loan_rollup.py's FIGURES: sums that are final once their day has closed (plan value, Operations).
+_LOAN_ROLLUP_FIGURES = frozenset({"plan_settled", "operations_settled", "merchant_settlement", "operations_collected"})
+
+
+@st.cache_data(ttl=_METADATA_TTL_SECONDS, show_spinner=False)
+def _loan_rollup_last_day(_conn):
+    """Latest DAY in LOAN_BOOK_ROLLUP_TABLE, or None when it is unset, missing or empty (base tables are summed instead)."""
+    if not LOAN_BOOK_ROLLUP_TABLE:
+        return None
+    try:
+        with _conn.cursor() as cur:
+            cur.execute(f"SELECT MAX(DAY) FROM {LOAN_BOOK_ROLLUP_TABLE}")
+            row = cur.fetchone()
+        return row[0] if row else None
+    except Exception:
+        return None
+
+
+def _rollup_figure_sql(name, builder, last_day, from_date=None, to_date=None):
+    """name's total from LOAN_BOOK_ROLLUP_TABLE for days up to last_day, plus the days after it (today's partial day,
+    or any the refresh has not reached yet) live from the base tables via builder, the figure's own *_sql builder."""
+    where, params = ["DAY <= %s"], [last_day.strftime("%Y-%m-%d")]
+    if from_date is not None and to_date is not None:
+        where.append("DAY >= %s AND DAY <= %s")
+        params += [from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")]
+    sql = f"SELECT (SELECT COALESCE(SUM({name}), 0) FROM {LOAN_BOOK_ROLLUP_TABLE} WHERE {' AND '.join(where)})"
+    live_from = last_day + timedelta(days=1)
+    if from_date is not None:
+        live_from = max(live_from, from_date)
+    live_to = to_date if to_date is not None else date.today()
+    if live_from <= live_to:
+        live_sql, live_params = builder(live_from, live_to)
+        sql += f" + ({live_sql.strip()})"
+        params += list(live_params)
+    return sql + " AS total", tuple(params)
+
+
+def _loan_book_queries(conn, from_date=None, to_date=None):
+    """{name: single-value SUM query} for every loan-book figure and each 'total settled' candidate (see
+    _TOTAL_SETTLED_PRIORITY); the Operations tables use their known columns (_OPERATIONS_SUM_COLUMNS), so no metadata round trip.
+    With a populated LOAN_BOOK_ROLLUP_TABLE the figures it holds (_LOAN_ROLLUP_FIGURES) read the daily roll-up instead
+    of the base tables; total_loaned and total_collected keep changing after their day closes, so they are always live."""
+    builders = {
+        "total_loaned": _loan_book_credit_limit_sql,
+        "plan_settled": _loan_book_settled_sql,
+        "total_collected": _loan_book_collected_sql,
+        "operations_settled": _operations_bnpl_transaction_total_sql,
+        "merchant_settlement": _operations_merchant_settlement_total_sql,
+        "operations_collected": _operations_bnpl_card_transaction_total_sql,
+    }
+    last_day = _loan_rollup_last_day(conn)
+    queries = {
+        name: _rollup_figure_sql(name, builder, last_day, from_date, to_date)
+        if last_day is not None and name in _LOAN_ROLLUP_FIGURES else builder(from_date, to_date)
+        for name, builder in builders.items()
+    }
+    queries["credit_allocated"] = _credit_allocated_sql()
+    return queries
 
 
 def load_loan_book_summary(conn, from_date=None, to_date=None):
     """Return dict: total_loaned, total_settled, total_collected, outstanding, operations_settled, operations_collected, credit_allocated. None on error."""
     if conn is None:
         return None
-    total_loaned = _run_scalar(conn, _loan_book_credit_limit_sql(from_date, to_date))
+    queries = _loan_book_queries(conn, from_date, to_date)
+    # One round trip for every figure; if any source table is missing the combined statement fails, so fall back to
+    # the queries individually (still submitted together) where each failure only blanks its own figure.
+    scalars = _run_row(conn, _combined_scalars_sql(queries), cast=float)
+    if scalars is None:
+        scalars = run_async_scalars(conn, queries)
+    if all(v is None for v in scalars.values()):
+        return None
+    total_loaned = scalars.get("total_loaned")
     if total_loaned is None:
         total_loaned = 0.0
-    total_settled = _resolve_total_settled(conn, from_date, to_date)
-    total_collected = _run_scalar(conn, _loan_book_collected_sql(from_date, to_date))
+    total_collected = scalars.get("total_collected")
     if total_collected is None:
         total_collected = 0.0
+    total_settled = _resolve_total_settled(conn, from_date, to_date, candidates=scalars)
     outstanding = max(0.0, float(total_settled) - float(total_collected))
-    operations_settled = load_operations_settled_to_merchants(conn, from_date, to_date)
-    operations_collected = load_operations_collections_from_cards(conn, from_date, to_date)
-    credit_allocated = load_credit_allocated(conn)
+    operations_settled = scalars.get("operations_settled")
+    operations_collected = scalars.get("operations_collected")
+    credit_allocated = scalars.get("credit_allocated")
     return {
         "total_loaned": total_loaned,
         "total_settled": total_settled,
@@ -1289,6 +1927,25 @@ def load_loan_book_summary(conn, from_date=None, to_date=None):
     }
 
 
+# persist="disk" ignores ttl, so freshness comes from the hourly as_of key instead; entries survive server restarts.
+@st.cache_data(persist="disk", max_entries=24, show_spinner=False)
+def _persisted_loan_book_summary(_conn, as_of, from_date, to_date):
+    summary = load_loan_book_summary(_conn, from_date, to_date)
+    if summary is None:
+        raise _NoResult
+    return summary
+
+
+def _cached_loan_book_summary(conn, as_of, from_date=None, to_date=None):
+    """load_loan_book_summary memoized per as_of bucket (a small dict of floats, cheap to pickle). A failed load
+    returns None without being written to disk, so a transient Snowflake error is retried on the next rerun instead
+    of serving an all-zero loan book for the rest of the hour."""
+    try:
+        return _persisted_loan_book_summary(conn, as_of, from_date, to_date)
+    except _NoResult:
+        return None
+
+
 def load_initial_collection_count(conn, from_date=None, to_date=None):
     """Initial collection = distinct consumers with at least one COMPLETED attempt where TYPE = 'initial' (checkout/first payment)."""
     if conn is None:
@@ -1324,78 +1981,79 @@ def load_consumer_events(conn, from_date=None, to_date=None, limit=5000):
         return None, None, None, None
 
 
+_CDC_BNPL = "CDC_BNPL_PRODUCTION.PUBLIC"
+
+
+def _attempt_instalment_join_sql(select, where, attempts_from=None, attempts_to=None, plans_from=None, plans_to=None):
+    """COLLECTION_ATTEMPT joined through the link table to its INSTALMENT and INSTALMENT_PLAN (aliases ca, l, i, p),
+    filtered in Snowflake. Optional half-open ranges on ca.EXECUTED_AT and p.CREATED_AT. Returns (sql, params)."""
+    conditions, params = [where], []
+    for col, lo, hi in (("ca.EXECUTED_AT", attempts_from, attempts_to), ("p.CREATED_AT", plans_from, plans_to)):
+        if lo is not None and hi is not None:
+            pred, p = _date_range_predicate(col, lo, hi)
+            conditions.append(pred)
+            params.extend(p)
+    return f"""
+SELECT {select}
+FROM {_CDC_BNPL}.COLLECTION_ATTEMPT ca
+JOIN {_CDC_BNPL}.COLLECTION_ATTEMPT_INSTALMENT_LINK l ON l.COLLECTION_ATTEMPT_ID = ca.ID
+JOIN {_CDC_BNPL}.INSTALMENT i ON i.ID = l.INSTALMENT_ID
+JOIN {_CDC_BNPL}.INSTALMENT_PLAN p ON p.ID = i.INSTALMENT_PLAN_ID
+WHERE {" AND ".join(conditions)}""", tuple(params)
+
+
+_NON_INITIAL_ATTEMPT = "COALESCE(ca.TYPE, '') COLLATE 'en-ci-trim' != 'INITIAL' AND ca.EXECUTED_AT IS NOT NULL"
+
+
+def _non_initial_attempts_sql(attempts_from=None, attempts_to=None, plans_from=None, plans_to=None):
+    """One row per non-initial attempt and linked instalment (ATTEMPT_ID, COMPLETED flag, EXECUTED_AT, INSTALMENT_ID,
+    CONSUMER_PROFILE_ID), ordered by EXECUTED_AT so per-instalment order is attempt order."""
+    sql, params = _attempt_instalment_join_sql(
+        "ca.ID AS ATTEMPT_ID, ca.STATUS COLLATE 'en-ci-trim' = 'COMPLETED' AS COMPLETED, ca.EXECUTED_AT, l.INSTALMENT_ID, p.CONSUMER_PROFILE_ID",
+        _NON_INITIAL_ATTEMPT,
+        attempts_from, attempts_to, plans_from, plans_to,
+    )
+    return sql + "\nORDER BY ca.EXECUTED_AT", params
+
+
+def _first_try_by_attempt_sql(from_date=None, to_date=None):
+    """Per attempt number (ROW_NUMBER over each instalment's non-initial attempts by EXECUTED_AT): TOTAL, SUCCESS, and on
+    every row FIRST_COLLECTION_CONSUMERS (distinct consumers with a COMPLETED first attempt). Returns (sql, params)."""
+    inner, params = _attempt_instalment_join_sql(
+        "p.CONSUMER_PROFILE_ID, ca.STATUS COLLATE 'en-ci-trim' = 'COMPLETED' AS OK, "
+        "ROW_NUMBER() OVER (PARTITION BY l.INSTALMENT_ID ORDER BY ca.EXECUTED_AT, ca.ID) AS ATTEMPT_NUM",
+        _NON_INITIAL_ATTEMPT,
+        from_date, to_date, from_date, to_date,
+    )
+    return f"""
+WITH x AS ({inner})
+SELECT ATTEMPT_NUM, COUNT(*) AS TOTAL, COUNT_IF(OK) AS SUCCESS,
+  (SELECT COUNT(DISTINCT CONSUMER_PROFILE_ID) FROM x WHERE ATTEMPT_NUM = 1 AND OK) AS FIRST_COLLECTION_CONSUMERS
+FROM x
+GROUP BY ATTEMPT_NUM
+ORDER BY ATTEMPT_NUM""", params
+
+
 def load_first_try_collection_from_cdc(conn, from_date=None, to_date=None, limit=MAX_ROWS):
     """First-try collection from CDC: INSTALMENT + COLLECTION_ATTEMPT_INSTALMENT_LINK + COLLECTION_ATTEMPT + INSTALMENT_PLAN.
     Non-initial attempts only; first attempt per instalment (by EXECUTED_AT). Returns (first_attempt_pct, n_first_collection, collection_by_attempt_df).
     Aligns with bnpl_functions.calc_first_try_success / calc_collection_efficiency."""
     if conn is None:
         return None, None, None
+    # Numbering and aggregation run in Snowflake; only one row per attempt number comes back
+    by_attempt = _run_query_df(conn, _first_try_by_attempt_sql(from_date, to_date), limit=limit)
+    if by_attempt is None or by_attempt.empty:
+        return None, None, None
     try:
-        date_filter = from_date is not None and to_date is not None
-        fd = from_date.strftime("%Y-%m-%d") if from_date else None
-        td = to_date.strftime("%Y-%m-%d") if to_date else None
-        # Load tables (use QUALIFIED and optional date filter on EXECUTED_AT for attempts)
-        df_plan = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "INSTALMENT_PLAN", limit=limit,
-            date_col="CREATED_AT" if date_filter else None, from_date=from_date, to_date=to_date,
-        )
-        df_inst = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "INSTALMENT", limit=limit,
-        )
-        df_ca = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "COLLECTION_ATTEMPT", limit=limit,
-            date_col="EXECUTED_AT" if date_filter else None, from_date=from_date, to_date=to_date,
-        )
-        df_link = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "COLLECTION_ATTEMPT_INSTALMENT_LINK", limit=limit,
-        )
-        if df_plan is None or df_plan.empty or df_inst is None or df_inst.empty or df_ca is None or df_ca.empty or df_link is None or df_link.empty:
-            return None, None, None
-        plan_id_col = next((c for c in df_plan.columns if str(c).upper() == "ID"), None)
-        plan_consumer_col = next((c for c in df_plan.columns if str(c).upper() == "CONSUMER_PROFILE_ID"), None)
-        inst_id_col = next((c for c in df_inst.columns if str(c).upper() == "ID"), None)
-        inst_plan_col = next((c for c in df_inst.columns if str(c).upper() == "INSTALMENT_PLAN_ID"), None)
-        ca_id_col = next((c for c in df_ca.columns if str(c).upper() == "ID"), None)
-        ca_status_col = next((c for c in df_ca.columns if str(c).upper() == "STATUS"), None)
-        ca_type_col = next((c for c in df_ca.columns if str(c).upper() == "TYPE"), None)
-        ca_exec_col = next((c for c in df_ca.columns if str(c).upper() in ("EXECUTED_AT", "CREATED_AT")), None)
-        link_ca_col = next((c for c in df_link.columns if str(c).upper() == "COLLECTION_ATTEMPT_ID"), None)
-        link_inst_col = next((c for c in df_link.columns if str(c).upper() == "INSTALMENT_ID"), None)
-        if not all([plan_id_col, plan_consumer_col, inst_id_col, inst_plan_col, ca_id_col, ca_status_col, ca_type_col, ca_exec_col, link_ca_col, link_inst_col]):
-            return None, None, None
-        df_ca["_type_upper"] = df_ca[ca_type_col].astype(str).str.upper().str.strip()
-        non_initial = df_ca[df_ca["_type_upper"] != "INITIAL"].copy()
-        if non_initial.empty:
-            return None, None, None
-        non_initial = non_initial.dropna(subset=[ca_exec_col]).sort_values(ca_exec_col)
-        joined = (
-            non_initial[[ca_id_col, ca_status_col, ca_exec_col]]
-            .merge(df_link[[link_ca_col, link_inst_col]], left_on=ca_id_col, right_on=link_ca_col, how="inner")
-            .merge(df_inst[[inst_id_col, inst_plan_col]], left_on=link_inst_col, right_on=inst_id_col, how="inner")
-            .merge(df_plan[[plan_id_col, plan_consumer_col]], left_on=inst_plan_col, right_on=plan_id_col, how="inner")
-        )
-        if joined.empty:
-            return None, None, None
-        first_per_inst = joined.sort_values(ca_exec_col).groupby(link_inst_col).first().reset_index()
-        first_per_inst["_success"] = first_per_inst[ca_status_col].astype(str).str.upper().str.strip() == "COMPLETED"
-        total_inst = len(first_per_inst)
-        first_success = first_per_inst["_success"].sum()
-        first_attempt_pct = round(100 * first_success / total_inst, 1) if total_inst else None
-        # First collection (funnel): distinct consumers who have at least one successful first repayment (non-initial instalment collected on first attempt)
-        inst_to_consumer = joined[[link_inst_col, plan_consumer_col]].drop_duplicates()
-        first_success_inst = first_per_inst[first_per_inst["_success"]][[link_inst_col]]
-        consumers_first_collection = first_success_inst.merge(inst_to_consumer, on=link_inst_col, how="inner")[plan_consumer_col].nunique()
-        joined["_attempt_num"] = joined.groupby(link_inst_col).cumcount() + 1
-        by_attempt = joined.groupby("_attempt_num").agg(
-            total=(ca_id_col, "count"),
-            success=(ca_status_col, lambda s: (s.astype(str).str.upper().str.strip() == "COMPLETED").sum()),
-        ).reset_index()
-        by_attempt.columns = ["attempt_number", "total", "success"]
+        by_attempt = by_attempt.rename(columns={"ATTEMPT_NUM": "attempt_number", "TOTAL": "total", "SUCCESS": "success"})
+        first = by_attempt[by_attempt["attempt_number"] == 1]
+        first_attempt_pct = round(100 * int(first["success"].iloc[0]) / int(first["total"].iloc[0]), 1) if not first.empty else None
+        consumers_first_collection = int(by_attempt["FIRST_COLLECTION_CONSUMERS"].iloc[0])
         by_attempt["failed"] = by_attempt["total"] - by_attempt["success"]
         by_attempt["success_pct"] = (100 * by_attempt["success"] / by_attempt["total"]).round(1)
         by_attempt["fail_pct"] = (100 * by_attempt["failed"] / by_attempt["total"]).round(1)
         collection_by_attempt_df = by_attempt[["attempt_number", "success_pct", "fail_pct", "total", "success", "failed"]]
-        return first_attempt_pct, int(consumers_first_collection), collection_by_attempt_df
+        return first_attempt_pct, consumers_first_collection, collection_by_attempt_df
     except Exception:
         return None, None, None
 
@@ -1405,95 +2063,30 @@ def load_successful_collections_by_merchant(conn, from_date=None, to_date=None,
     Returns pd.Series index=merchant name, value=count, or None on error."""
     if conn is None:
         return None
-    date_filter = from_date is not None and to_date is not None
-    try:
-        df_plan = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "INSTALMENT_PLAN", limit=limit,
-        )
-        df_inst = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "INSTALMENT", limit=limit,
-        )
-        df_ca = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "COLLECTION_ATTEMPT", limit=limit,
-            date_col="EXECUTED_AT" if date_filter else None, from_date=from_date, to_date=to_date,
-        )
-        df_link = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "COLLECTION_ATTEMPT_INSTALMENT_LINK", limit=limit,
-        )
-        if df_plan is None or df_plan.empty or df_inst is None or df_inst.empty or df_ca is None or df_ca.empty or df_link is None or df_link.empty:
-            return None
-        plan_id_col = next((c for c in df_plan.columns if str(c).upper() == "ID"), None)
-        client_name_col = next((c for c in df_plan.columns if str(c).upper() == "CLIENT_NAME"), None)
-        inst_id_col = next((c for c in df_inst.columns if str(c).upper() == "ID"), None)
-        inst_plan_col = next((c for c in df_inst.columns if str(c).upper() == "INSTALMENT_PLAN_ID"), None)
-        ca_id_col = next((c for c in df_ca.columns if str(c).upper() == "ID"), None)
-        ca_status_col = next((c for c in df_ca.columns if str(c).upper() == "STATUS"), None)
-        link_ca_col = next((c for c in df_link.columns if str(c).upper() == "COLLECTION_ATTEMPT_ID"), None)
-        link_inst_col = next((c for c in df_link.columns if str(c).upper() == "INSTALMENT_ID"), None)
-        if not all([plan_id_col, client_name_col, inst_id_col, inst_plan_col, ca_id_col, ca_status_col, link_ca_col, link_inst_col]):
-            return None
-        completed = df_ca[df_ca[ca_status_col].astype(str).str.upper().str.strip() == "COMPLETED"]
-        if completed.empty:
-            return pd.Series(dtype="int64")
-        joined = (
-            completed[[ca_id_col]]
-            .merge(df_link[[link_ca_col, link_inst_col]], left_on=ca_id_col, right_on=link_ca_col, how="inner")
-            .merge(df_inst[[inst_id_col, inst_plan_col]], left_on=link_inst_col, right_on=inst_id_col, how="inner")
-            .merge(df_plan[[plan_id_col, client_name_col]], left_on=inst_plan_col, right_on=plan_id_col, how="inner")
-        )
-        if joined.empty:
-            return pd.Series(dtype="int64")
-        by_merchant = joined.groupby(joined[client_name_col].fillna("(blank)")).size().sort_values(ascending=False)
-        return by_merchant
-    except Exception:
+    sql, params = _attempt_instalment_join_sql(
+        "COALESCE(p.CLIENT_NAME, '(blank)') AS MERCHANT, COUNT(*) AS N",
+        "ca.STATUS COLLATE 'en-ci-trim' = 'COMPLETED'",
+        from_date, to_date,
+    )
+    df = _run_query_df(conn, (sql + "\nGROUP BY 1\nORDER BY N DESC", params), limit=limit)
+    if df is None:
         return None
-
-
-def _parse_policy_trace_rejection_reasons(rules_raw):
-    """Extract rejection reason strings from CREDIT_POLICY_TRACE.RULES (JSON array with 'reason' key).
-    Keeps only reasons that start with 'Credit application rejected' (actual rejection triggers)."""
-    import json
-    reasons = []
-    if pd.isna(rules_raw):
-        return reasons
-    try:
-        rules = json.loads(rules_raw) if isinstance(rules_raw, str) else rules_raw
-        if not isinstance(rules, list):
-            return reasons
-        for r in rules:
-            if isinstance(r, dict) and "reason" in r:
-                reason_text = r.get("reason") or ""
-                if isinstance(reason_text, str) and reason_text.startswith("Credit application rejected"):
-                    reasons.append(reason_text)
-    except (json.JSONDecodeError, TypeError):
-        pass
-    return reasons
+    if df.empty:
+        return pd.Series(dtype="int64")
+    return df.set_index("MERCHANT")["N"].astype("int64").rename_axis(None)
 
 
 def load_rejection_reasons_from_policy_trace(conn, limit=5000):
-    """Load CREDIT_POLICY_TRACE for rejected consumers and return rejection reason counts.
-    Returns list of (reason_label, count) sorted by count descending. reason_label is shortened
+    """Load CREDIT_POLICY_TRACE rejection reason counts for rejected consumers (RULES flattened in Snowflake).
+    Returns list of (reason_label, pct) sorted by count descending. reason_label is shortened
     (e.g. 'Credit application rejected by rules: LOW_SCORE' -> 'LOW_SCORE')."""
     df = _run_query_df(conn, CREDIT_POLICY_TRACE_REJECTIONS_SQL, limit=limit)
-    if df is None or df.empty or "RULES" not in df.columns:
-        return None
-    all_reasons = []
-    for _, row in df.iterrows():
-        all_reasons.extend(_parse_policy_trace_rejection_reasons(row["RULES"]))
-    if not all_reasons:
+    if df is None or df.empty or "REASON" not in df.columns:
         return None
-    prefix = "Credit application rejected by rules: "
-    shortened = []
-    for r in all_reasons:
-        if r.startswith(prefix):
-            shortened.append(r[len(prefix) :].strip() or r)
-        else:
-            shortened.append(r)
-    counts = pd.Series(shortened).value_counts()
-    total = counts.sum()
+    total = df["CNT"].sum()
     if total == 0:
         return None
-    return [(label, round(100 * count / total, 0)) for label, count in counts.items()]
+    return [(label, round(100 * count / total, 0)) for label, count in zip(df["REASON"], df["CNT"])]
 
 
 def merchant_risk_from_plans_df(plans_df):
@@ -1504,19 +2097,24 @@ def merchant_risk_from_plans_df(plans_df):
     qty_col = next((c for c in plans_df.columns if str(c).upper() == "QUANTITY"), None)
     if merchant_col is None:
         return None
-    by_merchant = plans_df.groupby(plans_df[merchant_col].fillna("(blank)")).size()
+    # One groupby for plan counts and volume per merchant
+    merchant = plans_df[merchant_col].fillna("(blank)")
+    if qty_col:
+        agg = plans_df[qty_col].groupby(merchant).agg(["size", "sum"])
+        by_merchant = agg["size"].rename(None)
+        by_vol = agg["sum"].rename(qty_col).sort_values(ascending=False)
+    else:
+        by_merchant = plans_df.groupby(merchant).size()
+        by_vol = by_merchant
     if qty_col and plans_df[qty_col].notna().any():
-        vol = plans_df.groupby(plans_df[merchant_col].fillna("(blank)"))[qty_col].sum()
-        total = vol.sum()
+        total = by_vol.sum()
         if total and total > 0:
-            vol = vol.sort_values(ascending=False)
-            top3_pct = round(100 * vol.head(3).sum() / total, 0)
+            top3_pct = round(100 * by_vol.head(3).sum() / total, 0)
         else:
             top3_pct = round(100 * by_merchant.head(3).sum() / by_merchant.sum(), 0) if by_merchant.sum() else 0
     else:
         total_plans = by_merchant.sum()
         top3_pct = round(100 * by_merchant.nlargest(3).sum() / total_plans, 0) if total_plans else 0
-    by_vol = plans_df.groupby(plans_df[merchant_col].fillna("(blank)"))[qty_col].sum().sort_values(ascending=False) if qty_col and merchant_col else by_merchant
     return {
         "top3_volume_pct": top3_pct,
         "n_merchants": int(by_merchant.count()),
@@ -1571,21 +2169,18 @@ def merchant_exposure_from_plans(plans_df, portfolio_escalator_pp=None):
     concentration_risk_band = vol_pct.apply(_band_by_share)
     # Velocity Δ (4w): no 4-week data yet; use placeholder
     velocity_delta = pd.Series(None, index=vol_pct.index)
-    # Plan count and value per merchant (same order as vol_pct)
-    by_merchant = base.get("by_merchant")
-    plan_count = by_merchant.reindex(vol_pct.index).values if by_merchant is not None else None
-    value_per_merchant = by_vol.reindex(vol_pct.index).values
-    # Matrix df: merchant, plan_count, value, volume_share, concentration_risk_band, etc.
+    # Matrix df: merchant, plan_count, value, volume_share, concentration_risk_band, etc. Every series shares the merchant
+    # index, so the columns are aligned in a single construction (already in vol_pct order).
     matrix_df = pd.DataFrame({
         "merchant": vol_pct.index.astype(str),
-        "plan_count": plan_count,
-        "value": value_per_merchant,
-        "volume_share": vol_pct.values,
-        "escalator_share": esc_pct.reindex(vol_pct.index).values,
-        "fragility": fragility.reindex(vol_pct.index).values,
-        "concentration_risk_band": concentration_risk_band.reindex(vol_pct.index).values,
-        "size": (15 + vol_pct.reindex(vol_pct.index).values * 0.6).clip(18, 70),  # bubble size by volume
-    })
+        "plan_count": base.get("by_merchant"),
+        "value": by_vol,
+        "volume_share": vol_pct,
+        "escalator_share": esc_pct,
+        "fragility": fragility,
+        "concentration_risk_band": concentration_risk_band,
+        "size": (15 + vol_pct * 0.6).clip(18, 70),  # bubble size by volume
+    }, index=vol_pct.index).reset_index(drop=True)
     return {
         **base,
         "volume_pct": vol_pct,
@@ -1614,6 +2209,10 @@ def _persona_to_macro_zone(persona_key: str) -> str:
     return "healthy"  # default
 
 
+# _persona_to_macro_zone over the whole persona vocabulary, for Series.map (anything else falls to its "healthy" default).
+PERSONA_TO_ZONE = {p: _persona_to_macro_zone(p) for p in ("lilo", "early_finisher", "stitch", "jumba", "gantu", "never_activated", "unknown")}
+
+
 def _infer_consumer_persona_from_collections(conn, limit=MAX_ROWS, from_date=None, to_date=None):
     """
     Infer consumer segment from instalment + collection attempt + retry data (no SEGMENT column).
@@ -1623,78 +2222,61 @@ def _infer_consumer_persona_from_collections(conn, limit=MAX_ROWS, from_date=Non
     """
     if conn is None:
         return None
-    use_period = from_date is not None and to_date is not None
-    try:
-        df_plan = load_table_qualified(conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "INSTALMENT_PLAN", limit=limit)
-        df_inst = load_table_qualified(conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "INSTALMENT", limit=limit)
-        df_ca = load_table_qualified(
-            conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "COLLECTION_ATTEMPT", limit=limit,
-            date_col="EXECUTED_AT" if use_period else None, from_date=from_date, to_date=to_date,
-        )
-        df_link = load_table_qualified(conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "COLLECTION_ATTEMPT_INSTALMENT_LINK", limit=limit)
-    except Exception:
-        return None
-    if df_plan is None or df_plan.empty or df_inst is None or df_inst.empty or df_ca is None or df_ca.empty or df_link is None or df_link.empty:
-        return None
-    plan_id_col = next((c for c in df_plan.columns if str(c).upper() == "ID"), None)
-    plan_consumer_col = next((c for c in df_plan.columns if str(c).upper() == "CONSUMER_PROFILE_ID"), None)
-    inst_id_col = next((c for c in df_inst.columns if str(c).upper() == "ID"), None)
-    inst_plan_col = next((c for c in df_inst.columns if str(c).upper() == "INSTALMENT_PLAN_ID"), None)
-    ca_id_col = next((c for c in df_ca.columns if str(c).upper() == "ID"), None)
-    ca_status_col = next((c for c in df_ca.columns if str(c).upper() == "STATUS"), None)
-    ca_type_col = next((c for c in df_ca.columns if str(c).upper() == "TYPE"), None)
-    ca_exec_col = next((c for c in df_ca.columns if str(c).upper() in ("EXECUTED_AT", "CREATED_AT")), None)
-    link_ca_col = next((c for c in df_link.columns if str(c).upper() == "COLLECTION_ATTEMPT_ID"), None)
-    link_inst_col = next((c for c in df_link.columns if str(c).upper() == "INSTALMENT_ID"), None)
-    if not all([plan_id_col, plan_consumer_col, inst_id_col, inst_plan_col, ca_id_col, ca_status_col, ca_type_col, ca_exec_col, link_ca_col, link_inst_col]):
-        return None
-    df_ca["_type_upper"] = df_ca[ca_type_col].astype(str).str.upper().str.strip()
-    non_initial = df_ca[df_ca["_type_upper"] != "INITIAL"].copy()
-    if non_initial.empty:
-        return None
-    non_initial = non_initial.dropna(subset=[ca_exec_col]).sort_values(ca_exec_col)
-    joined = (
-        non_initial[[ca_id_col, ca_status_col, ca_exec_col]]
-        .merge(df_link[[link_ca_col, link_inst_col]], left_on=ca_id_col, right_on=link_ca_col, how="inner")
-        .merge(df_inst[[inst_id_col, inst_plan_col]], left_on=link_inst_col, right_on=inst_id_col, how="inner")
-        .merge(df_plan[[plan_id_col, plan_consumer_col]], left_on=inst_plan_col, right_on=plan_id_col, how="inner")
-    )
-    if joined.empty:
-        return None
-    first_per_inst = joined.sort_values(ca_exec_col).groupby(link_inst_col).first().reset_index()
-    first_per_inst["_success"] = first_per_inst[ca_status_col].astype(str).str.upper().str.strip() == "COMPLETED"
-    n_attempts_per_inst = joined.groupby(link_inst_col).size()
-    first_per_inst["_n_attempts"] = first_per_inst[link_inst_col].map(n_attempts_per_inst)
-    # Use consumer column from first_per_inst (from joined); avoid merge which can duplicate column name
-    consumer_col = plan_consumer_col if plan_consumer_col in first_per_inst.columns else next(
-        (c for c in first_per_inst.columns if "CONSUMER" in str(c).upper() or "CLIENT" in str(c).upper()), None
-    )
-    if consumer_col is None:
+    # Join, type filter and optional EXECUTED_AT period run in Snowflake
+    joined = _run_query_df(conn, _non_initial_attempts_sql(from_date, to_date), limit=limit)
+    if joined is None or joined.empty:
         return None
+    first_per_inst = joined.groupby("INSTALMENT_ID").first().reset_index()
+    first_per_inst["_success"] = first_per_inst["COMPLETED"].fillna(False).astype(bool)
+    n_attempts_per_inst = joined.groupby("INSTALMENT_ID").size()
+    first_per_inst["_retries"] = (first_per_inst["INSTALMENT_ID"].map(n_attempts_per_inst) - 1).clip(lower=0)
+    consumer_col = "CONSUMER_PROFILE_ID"
     per_consumer = first_per_inst.groupby(consumer_col).agg(
         first_try_success=("_success", "mean"),
-        avg_retries=("_n_attempts", lambda s: (s - 1).clip(0, None).mean()),
+        avg_retries=("_retries", "mean"),
         n_inst=("_success", "count"),
     ).reset_index()
     per_consumer.columns = [consumer_col, "first_try_success", "avg_retries", "n_inst"]
-    def _bucket(row):
-        ft = row["first_try_success"]
-        ret = row["avg_retries"] if pd.notna(row["avg_retries"]) else 0
-        if pd.isna(ft) or row["n_inst"] < 1:
-            return "lilo"
-        if ft >= 0.8 and ret <= 0.5:
-            return "lilo"
-        if ft >= 0.8 and ret <= 1.5:
-            return "early_finisher"
-        if ft >= 0.5 and ret <= 2.5:
-            return "stitch"
-        if ft >= 0.2 and ret <= 4:
-            return "jumba"
-        return "gantu"
-    per_consumer["_persona"] = per_consumer.apply(_bucket, axis=1)
+    ft = per_consumer["first_try_success"]
+    ret = per_consumer["avg_retries"].fillna(0)
+    # First matching band wins (np.select evaluates in order); anything left over is gantu
+    conditions = [
+        ft.isna() | (per_consumer["n_inst"] < 1),
+        (ft >= 0.8) & (ret <= 0.5),
+        (ft >= 0.8) & (ret <= 1.5),
+        (ft >= 0.5) & (ret <= 2.5),
+        (ft >= 0.2) & (ret <= 4),
+    ]
+    per_consumer["_persona"] = np.select(conditions, ["lilo", "lilo", "early_finisher", "stitch", "jumba"], default="gantu")
     return per_consumer.set_index(consumer_col)["_persona"]
 
 
+@st.cache_data(ttl=_TABLE_TTL_SECONDS, show_spinner=False)
+def _consumer_persona_zone(_conn):
+    """(consumer_persona, consumer_zone) Series indexed by consumer id: from CONSUMER_PROFILE's segment column when it
+    has one, else inferred from instalments + retries (_infer_consumer_persona_from_collections); None without segment
+    data. Memoized so reruns skip both the download and the classification."""
+    db, schema, table = "CDC_CONSUMER_PROFILE_PRODUCTION", "PUBLIC", "CONSUMER_PROFILE"
+    cols = get_table_columns(_conn, db, schema, table)
+    seg_col = next((c for c in ["SEGMENT", "BEHAVIOUR", "RISK_TIER", "STATUS", "TYPE", "CLUSTER"] if c in cols), None)
+    id_cp = next((c for c in cols if str(c).upper() in ("ID", "CONSUMER_PROFILE_ID")), None)
+    # Only the id and segment label cross the wire, not every CONSUMER_PROFILE column
+    df_cp = _run_query_df(
+        _conn, f"SELECT {quote_id(id_cp)} AS ID, {quote_id(seg_col)} AS SEGMENT FROM {_qualified(schema, table, db)}", limit=5000,
+    ) if seg_col and id_cp else None
+    if df_cp is not None and not df_cp.empty:
+        # Persona (stable, early_finisher, stitch, jumba, gantu, never_activated): classify each distinct label once, then map
+        segment = df_cp["SEGMENT"].fillna("").astype(str)
+        consumer_persona = segment.map({label: _match_persona_to_segment(label) for label in segment.unique()})
+        consumer_persona.index = df_cp["ID"]
+        return consumer_persona, consumer_persona.map(PERSONA_TO_ZONE).fillna("healthy")
+    # No segment column in CONSUMER_PROFILE: infer from existing instalments + retries + merchants
+    consumer_persona = _infer_consumer_persona_from_collections(_conn)
+    if consumer_persona is None or consumer_persona.empty:
+        return None
+    return consumer_persona, consumer_persona.map(PERSONA_TO_ZONE).fillna("healthy")
+
+
 def _segment_mix_by_merchant_from_plans(plans_df, conn):
     """
     Given plans_df with consumer_profile_id, client_name (merchant), quantity; and conn to load consumer segment.
@@ -1712,67 +2294,54 @@ def _segment_mix_by_merchant_from_plans(plans_df, conn):
     qty_col = next((c for c in plans_df.columns if str(c).upper() == "QUANTITY"), None)
     if not id_col or not merchant_col:
         return None
-    for db, schema, table in [("CDC_CONSUMER_PROFILE_PRODUCTION", "PUBLIC", "CONSUMER_PROFILE")]:
-        try:
-            df_cp = load_table_qualified(conn, db, schema, table, limit=5000)
-        except Exception:
-            continue
-        if df_cp.empty:
-            continue
-        seg_col = next((c for c in ["SEGMENT", "BEHAVIOUR", "RISK_TIER", "STATUS", "TYPE", "CLUSTER"] if c in df_cp.columns), None)
-        id_cp = next((c for c in df_cp.columns if str(c).upper() in ("ID", "CONSUMER_PROFILE_ID")), None)
-        if not seg_col or not id_cp:
-            continue
-        # Persona (stable, early_finisher, stitch, jumba, gantu, never_activated)
-        df_cp["_persona"] = df_cp[seg_col].fillna("").astype(str).apply(lambda s: _match_persona_to_segment(s))
-        df_cp["_zone"] = df_cp["_persona"].apply(_persona_to_macro_zone)
-        consumer_persona = df_cp.set_index(id_cp)["_persona"]
-        consumer_zone = df_cp.set_index(id_cp)["_zone"]
-        break
-    else:
-        # No segment column in CONSUMER_PROFILE: infer from existing instalments + retries + merchants
-        consumer_persona = _infer_consumer_persona_from_collections(conn)
-        if consumer_persona is None or consumer_persona.empty:
-            return None
-        consumer_zone = consumer_persona.apply(_persona_to_macro_zone)
+    persona_zone = _consumer_persona_zone(conn)
+    if persona_zone is None:
+        return None
+    consumer_persona = persona_zone[0]
     plans = plans_df[[id_col, merchant_col]].copy()
     plans["quantity"] = plans_df[qty_col] if qty_col and qty_col in plans_df.columns else 1
     plans["quantity"] = pd.to_numeric(plans["quantity"], errors="coerce").fillna(1)
-    # Don't default to Stable: consumers with no collection-attempt data stay "unknown" so mix is real
-    plans["_persona"] = plans[id_col].map(consumer_persona).fillna("unknown")
-    plans["_zone"] = plans[id_col].map(consumer_zone).fillna("unknown")
-
     persona_order = ["lilo", "early_finisher", "stitch", "jumba", "gantu", "never_activated", "unknown"]
+    # Don't default to Stable: consumers with no collection-attempt data stay "unknown" so mix is real.
+    # Categorical keys (persona in display order) let the groupby work on integer codes instead of hashing strings.
+    plans["_persona"] = plans[id_col].map(consumer_persona).fillna("unknown").astype(pd.CategoricalDtype(persona_order, ordered=True))
+    merchant = plans[merchant_col].fillna("(blank)").astype("category")
     persona_names = {"lilo": "Stable", "early_finisher": "Early payers", "stitch": "Rollers", "jumba": "Volatile", "gantu": "Repeat Defaulters", "never_activated": "Never", "unknown": "Unknown (no attempt data)"}
     zone_names = {"healthy": "Healthy", "friction": "Friction", "risk": "Risk", "never_activated": "Never", "unknown": "Unknown (no data)"}
 
-    by_merchant_persona = plans.groupby([plans[merchant_col].fillna("(blank)"), "_persona"])["quantity"].sum().unstack(fill_value=0)
-    by_merchant_zone = plans.groupby([plans[merchant_col].fillna("(blank)"), "_zone"])["quantity"].sum().unstack(fill_value=0)
+    # observed=True: only personas present become columns, already in persona_order
+    by_merchant_persona = plans.groupby([merchant, "_persona"], observed=True)["quantity"].sum().unstack(fill_value=0)
+    persona_cols = list(by_merchant_persona.columns)
+    # Zone is a function of persona, so collapse the persona columns instead of grouping the plans a second time
+    by_merchant_zone = by_merchant_persona.T.groupby([PERSONA_TO_ZONE.get(p, "healthy") for p in persona_cols]).sum().T
     zone_cols = [z for z in ["healthy", "friction", "risk", "never_activated", "unknown"] if z in by_merchant_zone.columns]
-    persona_cols = [p for p in persona_order if p in by_merchant_persona.columns]
     if not zone_cols:
         return None
     by_merchant_zone = by_merchant_zone.reindex(columns=zone_cols, fill_value=0)
-    by_merchant_persona = by_merchant_persona.reindex(columns=persona_cols, fill_value=0)
-    total_per_merchant = by_merchant_zone.sum(axis=1)
+    # Shares as matrices (rows = merchants, same order in both tables); the loop below only formats
+    zone_vals = by_merchant_zone.to_numpy(dtype=float)
+    persona_vals = by_merchant_persona.to_numpy(dtype=float)
+    tot = zone_vals.sum(axis=1)
+    has_tot = tot[:, None] > 0
+    zone_pct = 100 * np.divide(zone_vals, tot[:, None], out=np.zeros_like(zone_vals), where=has_tot)
+    persona_pct = 100 * np.divide(persona_vals, tot[:, None], out=np.zeros_like(persona_vals), where=has_tot)
+    zone_labels = [zone_names.get(z, z) for z in zone_cols]
+    persona_labels = [persona_names.get(p, p) for p in persona_cols]
+    healthy_i = zone_cols.index("healthy") if "healthy" in zone_cols else None
+    risk_i = zone_cols.index("risk") if "risk" in zone_cols else None
 
     out = {}
-    for merchant in by_merchant_zone.index:
-        row_zone = by_merchant_zone.loc[merchant]
-        row_persona = by_merchant_persona.loc[merchant] if merchant in by_merchant_persona.index else pd.Series(0, index=persona_cols)
-        tot = total_per_merchant.loc[merchant]
-        if tot <= 0:
-            out[str(merchant)] = {"summary": "—", "detail": "—", "stable_early_pct": None, "risk_pct": None}
+    for merchant, t, z_pct, p_pct in zip(by_merchant_zone.index.astype(str), tot, zone_pct, persona_pct):
+        if t <= 0:
+            out[merchant] = {"summary": "—", "detail": "—", "stable_early_pct": None, "risk_pct": None}
             continue
-        parts_zone = [f"{zone_names.get(z, z)} {round(100 * row_zone[z] / tot, 0):.0f}%" for z in zone_cols if row_zone[z] > 0]
-        parts_persona = [f"{persona_names.get(p, p)} {round(100 * row_persona[p] / tot, 0):.0f}%" for p in persona_cols if row_persona.get(p, 0) > 0]
-        stable_early = (row_zone.get("healthy", 0) / tot * 100) if tot else None
-        risk_pct = (row_zone.get("risk", 0) / tot * 100) if tot else None
-        out[str(merchant)] = {
+        parts_zone = [f"{label} {round(pct, 0):.0f}%" for label, pct in zip(zone_labels, z_pct) if pct > 0]
+        parts_persona = [f"{label} {round(pct, 0):.0f}%" for label, pct in zip(persona_labels, p_pct) if pct > 0]
+        out[merchant] = {
             "summary": ", ".join(parts_zone) if parts_zone else "—",
             "detail": ", ".join(parts_persona) if parts_persona else "—",
-            "stable_early_pct": round(stable_early, 1) if stable_early is not None else None,
-            "risk_pct": round(risk_pct, 1) if risk_pct is not None else None,
+            "stable_early_pct": round(float(z_pct[healthy_i]), 1) if healthy_i is not None else 0.0,
+            "risk_pct": round(float(z_pct[risk_i]), 1) if risk_i is not None else 0.0,
         }
     return out
 
@@ -1780,31 +2349,24 @@ def _segment_mix_by_merchant_from_plans(plans_df, conn):
 def load_table(conn, schema, table, limit=MAX_ROWS):
     """Load table into DataFrame. Numeric and date columns parsed."""
     with conn.cursor() as cur:
-        cur.execute(f'SELECT * FROM "{schema}"."{table}" LIMIT {limit}')
-        rows = cur.fetchall()
-        cols = [d[0] for d in cur.description]
-    df = pd.DataFrame(rows, columns=cols)
-    # Coerce numeric and datetime
-    for c in df.columns:
-        if df[c].dtype == object:
-            try:
-                df[c] = pd.to_numeric(df[c], errors="ignore")
-            except Exception:
-                pass
-        if df[c].dtype == object and df[c].dropna().astype(str).str.match(r"^\d{4}-\d{2}-\d{2}").any():
-            try:
-                df[c] = pd.to_datetime(df[c], errors="coerce")
-            except Exception:
-                pass
-    return df
+        cur.execute(_with_limit(f'SELECT * FROM "{schema}"."{table}"', limit))
+        df = _fetch_df(cur)
+    return _coerce_object_columns(df)
+
+
+# Plain substring/suffix tests equivalent to DATE_PATTERN / ID_PATTERN, without entering the regex engine per name.
+_DATE_NAME_PARTS = ("date", "time", "ts", "created", "updated")  # "timestamp" is covered by "time"
+_ID_NAME_SUFFIXES = ("id", "key")  # "_id" is covered by "id"
 
 
 def is_date_col(name):
-    return bool(DATE_PATTERN.search(name))
+    lower = name.lower()
+    return lower.endswith("_at") or any(p in lower for p in _DATE_NAME_PARTS)
 
 
 def is_likely_id(name):
-    return bool(ID_PATTERN.search(name))
+    lower = name.lower()
+    return lower.endswith(_ID_NAME_SUFFIXES) or "uuid" in lower
 
 
 # ——— BNPL benchmarks (South Africa & global) ———
@@ -1912,8 +2474,10 @@ def _tier_from_rank_sa(rank_sa: int) -> int:
     return 3
 
 
+@st.cache_data(max_entries=64, show_spinner=False)
 def _provider_logo_data_uri(provider_name: str, dashboard_dir: str):
-    """Return data URI for provider logo if file exists, else None. Used for Competitive Structure tier blocks."""
+    """Return data URI for provider logo if file exists, else None. Used for Competitive Structure tier blocks.
+    Memoized: logos are static assets, so reruns skip the file read and base64 encode."""
     key = PROVIDER_NAME_TO_LOGO_KEY.get(provider_name, provider_name)
     logo_path = None
     for c in SA_COMPETITORS:
@@ -1935,8 +2499,9 @@ def _provider_logo_data_uri(provider_name: str, dashboard_dir: str):
         return None
 
 
+@st.cache_data(max_entries=64, show_spinner=False)
 def _our_position_logo_data_uri(dashboard_dir: str):
-    """Return data URI for Our Position logo (Stitch BNPL) if file exists, else None."""
+    """Return data URI for Our Position logo (Stitch BNPL) if file exists, else None. Memoized like _provider_logo_data_uri."""
     path = os.path.join(dashboard_dir, OUR_POSITION_LOGO_PATH) if not os.path.isabs(OUR_POSITION_LOGO_PATH) else OUR_POSITION_LOGO_PATH
     if not os.path.exists(path):
         return None
@@ -2034,8 +2599,18 @@ FUNNEL_DROPOFF_SUGGESTIONS = [
 ]
 
 
+@st.cache_resource(show_spinner=False)
+def _funnel_composite_image(path: str):
+    """Decoded RGB composite.png, opened once per path and process so each step's crop comes from memory (never mutated:
+    crop() returns a new image)."""
+    from PIL import Image
+    return Image.open(path).convert("RGB")
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
 def _funnel_screen_data_uri(step_label: str, dashboard_dir: str, max_width: int = 218):
-    """Load step screenshot: prefer individual image in assets/funnel_screens/, else crop from composite.png. Always scale to max_width for consistent size."""
+    """Load step screenshot: prefer individual image in assets/funnel_screens/, else crop from composite.png. Always scale to max_width for consistent size.
+    Memoized: the decode + LANCZOS resize + PNG encode runs once per step, not on every render."""
     import io
     from PIL import Image
     screens_dir = os.path.join(dashboard_dir, "assets", "funnel_screens")
@@ -2064,7 +2639,7 @@ def _funnel_screen_data_uri(step_label: str, dashboard_dir: str, max_width: int
     if idx is None or idx < 0 or idx >= FUNNEL_COMPOSITE_NUM_SCREENS:
         return None
     try:
-        img = Image.open(path).convert("RGB")
+        img = _funnel_composite_image(path)
         w, h = img.size
         n = FUNNEL_COMPOSITE_NUM_SCREENS
         x0, x1 = int(w * idx / n), int(w * (idx + 1) / n)
@@ -2079,35 +2654,28 @@ def _funnel_screen_data_uri(step_label: str, dashboard_dir: str, max_width: int
         return None
 
 
+# detect_bnpl_columns name keywords per role (substring match on the lower-cased column name).
+_BNPL_AMOUNT_NAME_RE = re.compile("amount|value|balance|sum|principal|gmv|tpv")
+_BNPL_STATUS_NAME_RE = re.compile("status|state|outcome|result|decision")
+_BNPL_ID_NAME_RE = re.compile("customer|user|account|applicant")
+_BNPL_DEFAULT_NAME_RE = re.compile("default|delinquent|arrears|dpd|overdue")
+
+
 def detect_bnpl_columns(df):
-    """Heuristic: find amount, status, date, id, default-like columns."""
-    cols_lower = {c: c.lower() for c in df.columns}
-    amount_col = None
-    for c in df.columns:
-        if any(x in cols_lower[c] for x in ("amount", "value", "balance", "sum", "principal", "gmv", "tpv")):
-            if pd.api.types.is_numeric_dtype(df[c]):
-                amount_col = c
-                break
-    status_col = None
-    for c in df.columns:
-        if any(x in cols_lower[c] for x in ("status", "state", "outcome", "result", "decision")):
+    """Heuristic: find amount, status, date, id, default-like columns (the first match per role, in one pass)."""
+    amount_col = status_col = date_col = id_col = default_col = None
+    for c, dtype in df.dtypes.items():
+        name = c.lower()
+        if amount_col is None and _BNPL_AMOUNT_NAME_RE.search(name) and pd.api.types.is_numeric_dtype(dtype):
+            amount_col = c
+        if status_col is None and _BNPL_STATUS_NAME_RE.search(name):
             status_col = c
-            break
-    date_col = None
-    for c in df.columns:
-        if is_date_col(c) and pd.api.types.is_datetime64_any_dtype(df[c]):
+        if date_col is None and is_date_col(c) and pd.api.types.is_datetime64_any_dtype(dtype):
             date_col = c
-            break
-    id_col = None
-    for c in df.columns:
-        if any(x in cols_lower[c] for x in ("customer", "user", "account", "applicant")) and "id" in cols_lower[c]:
+        if id_col is None and "id" in name and _BNPL_ID_NAME_RE.search(name):
             id_col = c
-            break
-    default_col = None
-    for c in df.columns:
-        if any(x in cols_lower[c] for x in ("default", "delinquent", "arrears", "dpd", "overdue")):
+        if default_col is None and _BNPL_DEFAULT_NAME_RE.search(name):
             default_col = c
-            break
     return amount_col, status_col, date_col, id_col, default_col
 
 
@@ -2142,8 +2710,8 @@ def compute_bnpl_metrics(conn, tables):
             metrics["data_source"] = f"{schema}.{table}"
             if status and df[status].notna().any():
                 vals = df[status].astype(str).str.lower()
-                approved = vals.str.contains("approv|accept|success|completed|disburs", na=False).sum()
-                rejected = vals.str.contains("reject|decline|deny|fail", na=False).sum()
+                approved = vals.str.contains(APPROVED_STATUS_PATTERN, na=False).sum()
+                rejected = vals.str.contains(REJECTED_STATUS_PATTERN, na=False).sum()
                 if approved + rejected > 0:
                     metrics["approval_rate_pct"] = round(100 * approved / (approved + rejected), 1)
                     metrics["rejection_rate_pct"] = round(100 * rejected / (approved + rejected), 1)
@@ -2155,26 +2723,26 @@ def compute_bnpl_metrics(conn, tables):
             if id_col and df[id_col].notna().any():
                 n_cust = df[id_col].nunique()
                 metrics["active_customers"] = int(n_cust)
-                repeat_cust = (df.groupby(id_col).size() > 1).sum()
+                repeat_cust = df[id_col].value_counts().gt(1).sum()
                 if n_cust > 0:
                     metrics["repeat_rate_pct"] = round(100 * repeat_cust / n_cust, 1)
             if default_col:
                 if pd.api.types.is_numeric_dtype(df[default_col]):
                     in_default = (df[default_col] > 0).sum()
                 else:
-                    in_default = df[default_col].astype(str).str.lower().str.contains("yes|true|1|default|delinquent", na=False).sum()
+                    in_default = df[default_col].astype(str).str.lower().str.contains(DEFAULT_FLAG_PATTERN, na=False).sum()
                 if n > 0:
                     metrics["default_rate_pct"] = round(100 * in_default / n, 1)
             if date_col:
-                df_ts = df.copy()
-                df_ts[date_col] = pd.to_datetime(df_ts[date_col], errors="coerce")
-                df_ts = df_ts.dropna(subset=[date_col])
-                if len(df_ts) >= 2:
-                    monthly = df_ts.set_index(date_col).resample("ME").size()
+                # Only the date column is coerced (no frame copy); empty months/days count as 0 like a resample would
+                dates = pd.to_datetime(df[date_col], errors="coerce").dropna()
+                if len(dates) >= 2:
+                    monthly = dates.dt.to_period("M").value_counts().sort_index()
+                    monthly = monthly.reindex(pd.period_range(monthly.index[0], monthly.index[-1], freq="M"), fill_value=0)
                     if len(monthly) >= 2:
                         metrics["growth_mom_pct"] = round(100 * (monthly.iloc[-1] - monthly.iloc[-2]) / max(monthly.iloc[-2], 1), 1)
-                    trend_df = df_ts.set_index(date_col).resample("D").size().reset_index(name="volume")
-                    trend_df.columns = ["date", "volume"]
+                    daily = dates.groupby(dates.dt.normalize()).size().asfreq("D", fill_value=0)
+                    trend_df = daily.rename_axis("date").reset_index(name="volume")
             if metrics.get("applications") or metrics.get("gmv"):
                 break
         except Exception:
@@ -2198,7 +2766,7 @@ def _penalty_ratio_from_overdue_instalments(df_overdue: pd.DataFrame):
     # Penalty-related on instalment: PENALTY_AMOUNT, PENALTY, FEE, LATE_FEE, etc.
     penalty_col = None
     for name, c in cols_upper.items():
-        if any(x in name for x in ("PENALTY", "LATE_FEE", "FEE", "LATE_CHARGE")) and "REASON" not in name and "STATUS" not in name:
+        if _is_penalty_column(name):
             penalty_col = c
             break
     # Amount: QUANTITY (instalment amount), AMOUNT, PRINCIPAL
@@ -2415,7 +2983,7 @@ def load_bnpl_known_tables(conn, from_date=None, to_date=None):
                 continue
         status_col = next((c for c in df_plan.columns if str(c).upper() in ("STATUS", "STATE", "OUTCOME", "DECISION")), None)
         if status_col and not df_plan.empty:
-            s = df_plan[status_col].astype(str).str.upper().str.strip()
+            s = _norm_upper(df_plan[status_col])
             allocated = s.isin(ALLOCATED_STATUS).sum()
             not_allocated = s.isin(NOT_ALLOCATED_STATUS).sum()
             total_dec = allocated + not_allocated
@@ -2443,7 +3011,7 @@ def load_bnpl_known_tables(conn, from_date=None, to_date=None):
         if not df_col.empty and "CLIENT_ID" in df_col.columns and "STATUS" in df_col.columns and "CREATED_AT" in df_col.columns:
             df_col = df_col.dropna(subset=["CREATED_AT"]).sort_values("CREATED_AT")
             first = df_col.groupby("CLIENT_ID").first().reset_index()
-            status_upper = first["STATUS"].astype(str).str.upper().str.strip()
+            status_upper = _norm_upper(first["STATUS"])
             success_first = status_upper.isin(COLLECTION_SUCCESS_VALUES).sum()
             first_attempt_pct = round(100 * success_first / len(first), 1) if len(first) else None
             metrics["n_first_collection"] = len(first)
@@ -2467,10 +3035,11 @@ def load_bnpl_known_tables(conn, from_date=None, to_date=None):
         date_col_ca = "EXECUTED_AT" if "EXECUTED_AT" in df_ca.columns else "CREATED_AT"
         if date_col_ca in df_ca.columns:
             df_ca = df_ca.dropna(subset=[date_col_ca]).sort_values([ "TRANSACTION_ID", date_col_ca])
+            # Normalise STATUS once; the aggregations below sum this boolean with the built-in "sum"
+            df_ca["_success"] = _norm_upper(df_ca["STATUS"]).eq("COMPLETED")
             # First attempt per transaction (for first_attempt_pct)
             first_ca = df_ca.groupby("TRANSACTION_ID").first().reset_index()
-            status_ca = first_ca["STATUS"].astype(str).str.upper().str.strip()
-            success_first_ca = (status_ca == "COMPLETED").sum()
+            success_first_ca = first_ca["_success"].sum()
             if len(first_ca):
                 first_attempt_pct = round(100 * success_first_ca / len(first_ca), 1)
             if metrics.get("n_first_collection") is None:
@@ -2479,7 +3048,7 @@ def load_bnpl_known_tables(conn, from_date=None, to_date=None):
             df_ca["_attempt_num"] = df_ca.groupby("TRANSACTION_ID").cumcount() + 1
             by_attempt = df_ca.groupby("_attempt_num").agg(
                 total=("STATUS", "count"),
-                success=("STATUS", lambda s: (s.astype(str).str.upper().str.strip() == "COMPLETED").sum()),
+                success=("_success", "sum"),
             ).reset_index()
             by_attempt.columns = ["attempt_number", "total", "success"]
             by_attempt["failed"] = by_attempt["total"] - by_attempt["success"]
@@ -2488,8 +3057,8 @@ def load_bnpl_known_tables(conn, from_date=None, to_date=None):
             collection_by_attempt_df = by_attempt[["attempt_number", "success_pct", "fail_pct", "total", "success", "failed"]]
             # Top collection failure reasons (REASON or FAILURE_CLASSIFICATION)
             reason_col = next((c for c in df_ca.columns if str(c).upper() in ("REASON", "FAILURE_CLASSIFICATION", "INTERNAL_REASON")), None)
-            if reason_col and (df_ca["STATUS"].astype(str).str.upper().str.strip() != "COMPLETED").any():
-                failed_only = df_ca[df_ca["STATUS"].astype(str).str.upper().str.strip() != "COMPLETED"]
+            if reason_col and not df_ca["_success"].all():
+                failed_only = df_ca[~df_ca["_success"]]
                 failure_reasons_df = failed_only[reason_col].fillna("(unknown)").astype(str).value_counts().head(10).reset_index()
                 failure_reasons_df.columns = ["reason", "count"]
             else:
@@ -2520,16 +3089,15 @@ def load_bnpl_known_tables(conn, from_date=None, to_date=None):
         attempt_col = next((c for c in df_card.columns if str(c).upper().replace(" ", "_") == "ATTEMPT_NUMBER"), None)
         status_col = next((c for c in df_card.columns if "COLLECTION_STATUS" in str(c).upper() or (str(c).upper() == "STATUS" and c != attempt_col)), None)
         if not df_card.empty and attempt_col and status_col:
+            df_card["_success"] = _norm_upper(df_card[status_col]).isin(COLLECTION_SUCCESS_VALUES)
             first_card = df_card[df_card[attempt_col] == 1] if pd.api.types.is_numeric_dtype(df_card[attempt_col]) else df_card[df_card[attempt_col].astype(str).str.strip() == "1"]
             if len(first_card):
-                st_upper = first_card[status_col].astype(str).str.upper().str.strip()
-                success_1 = st_upper.isin(COLLECTION_SUCCESS_VALUES).sum()
-                first_attempt_pct = round(100 * success_1 / len(first_card), 1)
+                first_attempt_pct = round(100 * first_card["_success"].sum() / len(first_card), 1)
             if metrics.get("n_first_collection") is None:
                 metrics["n_first_collection"] = len(first_card)
             by_attempt_card = df_card.groupby(attempt_col).agg(
                 total=(status_col, "count"),
-                success=(status_col, lambda s: s.astype(str).str.upper().str.strip().isin(COLLECTION_SUCCESS_VALUES).sum()),
+                success=("_success", "sum"),
             ).reset_index()
             by_attempt_card.columns = ["attempt_number", "total", "success"]
             by_attempt_card["success_pct"] = (100 * by_attempt_card["success"] / by_attempt_card["total"]).round(1)
@@ -3592,6 +4160,18 @@ INSTALMENT_SUCCESS_VALUES = {"COMPLETED", "PAID", "SUCCESS", "ACTIVE", "SETTLED"
 EARLY_FINISHER_PLAN_STATUS_VALUES = {"COMPLETED", "PAID", "PAID_IN_FULL", "SETTLED", "CLOSED"}
 
 
+def _share_join_categories(*keys):
+    """Cast string join keys, given as (df, column) pairs, in place to one shared CategoricalDtype so the merges between
+    them join on integer codes instead of hashing every UUID again (and hold each ID once). Numeric keys are left as-is.
+    Group by a cast key with observed=True."""
+    if all(pd.api.types.is_numeric_dtype(df[c]) for df, c in keys):
+        return
+    categories = pd.concat([df[c].astype(object) for df, c in keys], ignore_index=True).dropna().unique()
+    dtype = pd.CategoricalDtype(categories)
+    for df, c in keys:
+        df[c] = df[c].astype(object).astype(dtype)
+
+
 def load_early_finisher_pct_from_external_collections(conn, from_date=None, to_date=None):
     """
     Early instalments are classified as external collection: COLLECTION_ATTEMPT with TYPE = 'EXTERNAL', STATUS = 'COMPLETED'.
@@ -3602,8 +4182,6 @@ def load_early_finisher_pct_from_external_collections(conn, from_date=None, to_d
     if conn is None:
         return None, None, None
     date_filter = from_date is not None and to_date is not None
-    fd = from_date.strftime("%Y-%m-%d") if from_date else None
-    td = to_date.strftime("%Y-%m-%d") if to_date else None
     try:
         df_ca = load_table_qualified(
             conn, "CDC_BNPL_PRODUCTION", "PUBLIC", "COLLECTION_ATTEMPT", limit=MAX_ROWS,
@@ -3640,9 +4218,12 @@ def load_early_finisher_pct_from_external_collections(conn, from_date=None, to_d
     plan_id = next((c for c in df_plan.columns if str(c).upper() == "ID"), None)
     if not all([link_ca, link_inst, inst_id, inst_plan, plan_id]):
         return None, None, None
+    _share_join_categories((df_ca, ca_id_col), (df_link, link_ca))
+    _share_join_categories((df_link, link_inst), (df_inst, inst_id))
+    _share_join_categories((df_inst, inst_plan), (df_plan, plan_id))
     external_completed = (
-        (df_ca[type_col].astype(str).str.upper().str.strip() == "EXTERNAL") &
-        (df_ca[status_col].astype(str).str.upper().str.strip() == "COMPLETED")
+        (_norm_upper(df_ca[type_col]) == "EXTERNAL") &
+        (_norm_upper(df_ca[status_col]) == "COMPLETED")
     )
     ca_ok = df_ca.loc[external_completed, [ca_id_col] + ([exec_col] if exec_col else [])].copy()
     if ca_ok.empty:
@@ -3719,6 +4300,9 @@ def load_rollers_missed_then_retry(conn, from_date=None, to_date=None):
     plan_id = next((c for c in df_plan.columns if str(c).upper() == "ID"), None)
     if not all([link_ca, link_inst, inst_id, inst_plan, plan_id]):
         return None, None, None
+    _share_join_categories((df_ca, ca_id_col), (df_link, link_ca))
+    _share_join_categories((df_link, link_inst), (df_inst, inst_id))
+    _share_join_categories((df_inst, inst_plan), (df_plan, plan_id))
     merged = (
         df_ca[[ca_id_col, status_col, exec_col]]
         .merge(df_link[[link_ca, link_inst]], left_on=ca_id_col, right_on=link_ca, how="inner")
@@ -3732,13 +4316,13 @@ def load_rollers_missed_then_retry(conn, from_date=None, to_date=None):
     if merged.empty:
         return None, None, None
     merged = merged.dropna(subset=[exec_col]).sort_values([link_inst, exec_col])
-    status_upper = merged[status_col].astype(str).str.upper().str.strip()
+    status_upper = _norm_upper(merged[status_col])
     merged["_completed"] = status_upper == "COMPLETED"
     d_due = pd.to_datetime(merged[inst_due], errors="coerce")
     d_exec = pd.to_datetime(merged[exec_col], errors="coerce")
     merged["_late"] = d_exec.notna() & d_due.notna() & (d_exec > d_due)
     roller_consumers = set()
-    for inst_id_val, grp in merged.groupby(link_inst):
+    for inst_id_val, grp in merged.groupby(link_inst, observed=True):
         grp = grp.sort_values(exec_col)
         first = grp.iloc[0]
         first_missed = first["_late"] or not first["_completed"]
@@ -3800,6 +4384,9 @@ def load_rollers_list(conn, from_date=None, to_date=None):
     plan_id = next((c for c in df_plan.columns if str(c).upper() == "ID"), None)
     if not all([status_col, ca_id_col, exec_col, link_ca, link_inst, inst_id, inst_plan, plan_id]) or not inst_due:
         return None, 0
+    _share_join_categories((df_ca, ca_id_col), (df_link, link_ca))
+    _share_join_categories((df_link, link_inst), (df_inst, inst_id))
+    _share_join_categories((df_inst, inst_plan), (df_plan, plan_id))
     merged = (
         df_ca[[ca_id_col, status_col, exec_col]]
         .merge(df_link[[link_ca, link_inst]], left_on=ca_id_col, right_on=link_ca, how="inner")
@@ -3813,13 +4400,13 @@ def load_rollers_list(conn, from_date=None, to_date=None):
     if merged.empty:
         return None, 0
     merged = merged.dropna(subset=[exec_col]).sort_values([link_inst, exec_col])
-    status_upper = merged[status_col].astype(str).str.upper().str.strip()
+    status_upper = _norm_upper(merged[status_col])
     merged["_completed"] = status_upper == "COMPLETED"
     d_due = pd.to_datetime(merged[inst_due], errors="coerce")
     d_exec = pd.to_datetime(merged[exec_col], errors="coerce")
     merged["_late"] = d_exec.notna() & d_due.notna() & (d_exec > d_due)
     roller_consumer_ids = set()
-    for _inst_id_val, grp in merged.groupby(link_inst):
+    for _inst_id_val, grp in merged.groupby(link_inst, observed=True):
         grp = grp.sort_values(exec_col)
         first = grp.iloc[0]
         first_missed = first["_late"] or not first["_completed"]
@@ -3839,9 +4426,7 @@ def load_rollers_list(conn, from_date=None, to_date=None):
                 f'SELECT ID, FIRST_NAME, LAST_NAME, EMAIL FROM {qual} WHERE ID IN ({placeholders})',
                 ids_list,
             )
-            rows = cur.fetchall()
-            cols = [d[0] for d in cur.description]
-        df = pd.DataFrame(rows, columns=cols)
+            df = _fetch_df(cur)
         df = df.rename(columns={c: "consumer_profile_id" if str(c).upper() == "ID" else c for c in df.columns})
         return (df, len(ids_list))
     except Exception:
@@ -3883,12 +4468,15 @@ def load_early_finisher_pct(conn, from_date=None, to_date=None):
     completed_col = next((cols_upper.get(c) for c in ("COMPLETED_AT", "PAID_AT", "END_DATE", "CLOSED_AT") if c in cols_upper), None)
     end_scheduled_col = next((cols_upper.get(c) for c in ("SCHEDULED_END_DATE", "END_DATE") if c in cols_upper), None)
     paid_full_col = next((cols_upper.get(c) for c in ("PAID_IN_FULL", "PAID_IN_FULL_FLAG", "EARLY_FINISHED") if c in cols_upper), None)
-    status_upper = df[status_col].fillna("").astype(str).str.upper().str.strip()
+    status_upper = _norm_upper(df[status_col].fillna(""))
     completed_plans = status_upper.isin(EARLY_FINISHER_PLAN_STATUS_VALUES)
     if paid_full_col is not None:
-        paid_full = df[paid_full_col].fillna(False)
-        if paid_full.dtype == object:
-            paid_full = paid_full.astype(str).str.upper().str.strip().isin(("TRUE", "1", "YES", "T"))
+        paid_full = df[paid_full_col]
+        # VARCHAR flags arrive as object or (via _coerce_object_columns) Arrow string columns
+        if pd.api.types.is_object_dtype(paid_full) or pd.api.types.is_string_dtype(paid_full):
+            paid_full = _norm_upper(paid_full).isin(("TRUE", "1", "YES", "T"))
+        else:
+            paid_full = paid_full.fillna(False).astype(bool)
         early = completed_plans & paid_full
     elif completed_col is not None and end_scheduled_col is not None:
         try:
@@ -3965,7 +4553,7 @@ def load_initial_installment_personas(conn, from_date=None, to_date=None):
         else:
             df = df.sort_values(group_col)
         first = df.groupby(group_col).first().reset_index()
-        s = first[status_col].astype(str).str.upper().str.strip()
+        s = _norm_upper(first[status_col])
         became = s.isin(INSTALMENT_SUCCESS_VALUES).sum()
         never = len(first) - became
         total = len(first)
@@ -4473,9 +5061,7 @@ def render_bnpl_performance(conn, tables):
             metrics["penalty_ratio_pct"] = penalty_pct
     # Merchant section: use plans in selected date range (e.g. past month) so plan counts reflect all orders in period, not just today
     fd, td = st.session_state.get("bnpl_from_date"), st.session_state.get("bnpl_to_date") if conn else (None, None)
-    instalment_plans_today_df = load_instalment_plans_for_period(conn, fd, td) if (conn and fd and td) else None
-    if instalment_plans_today_df is None and conn:
-        instalment_plans_today_df = load_instalment_plans_created_today(conn)
+    instalment_plans_today_df = _cached_instalment_plans(conn, fd, td) if conn else None
     merchant_risk_today = merchant_risk_from_plans_df(instalment_plans_today_df) if instalment_plans_today_df is not None else None
     top3_source = (merchant_risk_today.get("top3_volume_pct") if merchant_risk_today else None) or merchant.get("top3_volume_pct")
     # Total plan amount and revenue (4.99% per plan) for top bar and revenue section
@@ -4583,12 +5169,10 @@ def render_bnpl_performance(conn, tables):
     # Sticky context bar: date range + last refreshed + compare — always visible on scroll
     compare_on = st.session_state.get("bnpl_compare_mode", False)
     compare_label = "On" if compare_on else "Off"
-    sticky_bar_html = (
-        '<div class="bnpl-sticky-context-bar">'
-        '<span class="bnpl-context-date">' + html.escape(date_range_text) + '</span>'
-        '<span class="bnpl-context-refresh">' + (html.escape(refreshed_str) if refreshed_str else '—') + '</span>'
-        '<span class="bnpl-context-compare">Compare: <strong>' + compare_label + '</strong> <span style="font-size:0.7em; opacity:0.85;">(change in sidebar)</span></span>'
-        '</div>'
+    sticky_bar_html = _STICKY_BAR_TEMPLATE.substitute(
+        date_range=html.escape(date_range_text),
+        refreshed=html.escape(refreshed_str) if refreshed_str else '—',
+        compare=compare_label,
     )
     st.markdown(sticky_bar_html, unsafe_allow_html=True)
     status_tooltip = "From default rate, first-attempt success, approval rate, and segment drift."
@@ -4711,7 +5295,7 @@ def render_bnpl_performance(conn, tables):
 
     with st.expander("Loan book summary", expanded=_section_expanded.get("loan_book", True)):
         # ——— Loan book summary (credit limit, settled, collected, outstanding) ———
-        loan_book = load_loan_book_summary(conn, None, None) if conn else None
+        loan_book = _cached_loan_book_summary(conn, datetime.now().strftime("%Y-%m-%d %H")) if conn else None
         lb_label = "font-size:0.65rem; text-transform:uppercase; letter-spacing:0.04em; color:" + PALETTE["text_soft"] + "; font-weight:500;"
         lb_value = "font-size:1.1rem; font-weight:700; color:" + PALETTE["heading"] + "; letter-spacing:-0.02em;"
         lb_box = "background:" + PALETTE["panel"] + "; border:1px solid " + PALETTE["border"] + "; border-radius:8px; padding:12px 16px;"
@@ -4797,13 +5381,9 @@ def render_bnpl_performance(conn, tables):
         if not insight_bullets:
             insight_bullets.append("<strong>Settled</strong> is what you have paid to merchants. <strong>Collected</strong> is what you have recovered from users. The <strong>funding gap</strong> is the difference (cash you have funded, not yet recovered).")
         st.markdown(
-            '<div class="thesis-box" style="margin-top:' + SPACING["component"] + ';">'
-            '<p style="margin:0 0 0.5rem 0; font-size:0.75rem; text-transform:uppercase; letter-spacing:0.04em; color:' + PALETTE["text_soft"] + ';">Insights</p>'
-            '<ul style="margin:0; padding-left:1.2rem; font-size:0.85rem; line-height:1.6; color:' + PALETTE["text"] + ';">'
-            + "".join(f"<li style='margin-bottom:0.25rem;'>{b}</li>" for b in insight_bullets) +
-            '</ul>'
-            '<p style="margin:0.5rem 0 0 0; font-size:0.75rem; color:' + PALETTE["text_soft"] + ';">Hover over each metric above for a short tooltip. Recovery rate = collected ÷ settled. Utilization = settled ÷ credit allocated.</p>'
-            '</div>',
+            _INSIGHTS_BOX_OPEN
+            + "".join(f"<li style='margin-bottom:0.25rem;'>{b}</li>" for b in insight_bullets)
+            + _INSIGHTS_BOX_CLOSE,
             unsafe_allow_html=True,
         )
         st.caption("All-time snapshot. Credit allocated (CREDIT_BALANCE); Operations: BNPLTRANSACTION (settled), BNPLCARDTRANSACTION (collected). Percentages show recovery rate, utilization, and gap share.")
@@ -4813,20 +5393,36 @@ def render_bnpl_performance(conn, tables):
     with st.expander("Conversion funnel", expanded=_section_expanded.get("funnel", True)):
         funnel_fd = st.session_state.get("bnpl_from_date")
         funnel_td = st.session_state.get("bnpl_to_date")
-        n_consumers_with_plan = load_consumers_with_plan_count(conn, funnel_fd, funnel_td) if conn else None
-        n_consumers_with_plan_all = load_consumers_with_plan_count(conn, None, None) if conn else None
-        rejected_df = load_rejected_credit_check(conn) if conn else None
-        kyc_df = load_kyc_rejects(conn) if conn else None
-        n_rejected = load_rejected_credit_check_count(conn, funnel_fd, funnel_td) if conn else None
+        # Every funnel query is independent, so fire them together: the section waits for the slowest, not the sum.
+        funnel_q = run_parallel(
+            conn,
+            {
+                "consumer_counts": (_run_row, _consumer_funnel_counts_sql(funnel_fd, funnel_td)),
+                "plan_counts": (_run_row, _plan_funnel_counts_sql(funnel_fd, funnel_td)),
+                "rejected_df": (_run_query_df, REJECTED_CREDIT_CHECK_SQL),
+                "kyc_df": (_run_query_df, KYC_REJECTS_SQL),
+                "kyc_not_verified": KYC_REJECTS_COUNT_SQL,
+                "plan_creation": _plan_creation_from_attempts_sql(funnel_fd, funnel_td),
+                "initial_collection": _initial_collection_count_sql(funnel_fd, funnel_td),
+            },
+            runner=_run_count,
+        )
+        consumer_counts = funnel_q["consumer_counts"] or {}
+        plan_counts = funnel_q["plan_counts"] or {}
+        n_consumers_with_plan = plan_counts.get("consumers_with_plan")
+        n_consumers_with_plan_all = plan_counts.get("consumers_with_plan_all")
+        rejected_df = funnel_q["rejected_df"]
+        kyc_df = funnel_q["kyc_df"]
+        n_rejected = consumer_counts.get("rejected")
         if n_rejected is None and rejected_df is not None:
             n_rejected = len(rejected_df)
         n_rejected = n_rejected if n_rejected is not None else 0
-        n_kyc_not_verified = load_kyc_rejects_count(conn) if conn else None
+        n_kyc_not_verified = funnel_q["kyc_not_verified"]
         if n_kyc_not_verified is None and kyc_df is not None:
             n_kyc_not_verified = len(kyc_df)
         n_kyc_not_verified = n_kyc_not_verified if n_kyc_not_verified is not None else 0
-        n_applied = load_applied_count(conn, funnel_fd, funnel_td) if conn else None
-        n_credit_check_completed = load_approved_count(conn, funnel_fd, funnel_td) if conn else None  # CONSUMER_PROFILE where CREDIT_CHECK_STATUS != 'REJECTED'
+        n_applied = consumer_counts.get("applied")
+        n_credit_check_completed = consumer_counts.get("approved")  # CONSUMER_PROFILE where CREDIT_CHECK_STATUS != 'REJECTED'
         if n_applied is None or n_applied <= 0:
             n_applied = int(n_credit_check_completed * 1.05) if n_credit_check_completed else 1240
             n_applied = max(n_applied, n_credit_check_completed or 0)
@@ -4834,19 +5430,19 @@ def render_bnpl_performance(conn, tables):
         if n_credit_check_completed is None:
             n_credit_check_completed = 923
         n_credit_check_completed = int(n_credit_check_completed)
-        n_kyc_completed = load_kyc_verified_count(conn, funnel_fd, funnel_td) if conn else None
+        n_kyc_completed = consumer_counts.get("kyc_verified")
         if n_kyc_completed is None or (isinstance(n_kyc_completed, (int, float)) and n_kyc_completed <= 0):
             n_kyc_completed = n_credit_check_completed + n_kyc_not_verified
             if n_kyc_completed < n_credit_check_completed:
                 n_kyc_completed = n_credit_check_completed
         n_kyc_completed = int(n_kyc_completed)
-        n_plan_creation = load_plan_creation_from_attempts(conn, funnel_fd, funnel_td) if conn else None
+        n_plan_creation = funnel_q["plan_creation"]
         if n_plan_creation is None or (isinstance(n_plan_creation, (int, float)) and n_plan_creation <= 0):
             n_plan_creation = int(n_credit_check_completed * 0.97) if n_credit_check_completed else 700
         n_plan_creation = int(n_plan_creation)
         if n_plan_creation > n_credit_check_completed and n_credit_check_completed > 0:
             n_plan_creation = n_credit_check_completed
-        n_initial_collection = load_initial_collection_count(conn, funnel_fd, funnel_td) if conn else None
+        n_initial_collection = funnel_q["initial_collection"]
         if n_initial_collection is None or (isinstance(n_initial_collection, (int, float)) and n_initial_collection <= 0):
             n_initial_collection = int(n_plan_creation * 0.95) if n_plan_creation else 665
         n_initial_collection = int(n_initial_collection)
@@ -5478,7 +6074,7 @@ def render_bnpl_performance(conn, tables):
     # ——— SECTION 8: INTELLIGENCE SUMMARY (data-driven bullets only) ———
     insight_bullets = _intelligence_summary_bullets(metrics, persona_pcts, persona_deltas, merchant, signal_label, first_attempt_pct)
     def _bullet_html(txt):
-        return re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", str(txt))
+        return _MD_BOLD_RE.sub(r"<strong>\1</strong>", str(txt))
     if insight_bullets:
         bullet_li = "".join(
             f'<li class="intelligence-summary-bullet">{_bullet_html(b)}</li>' for b in insight_bullets
@@ -5710,8 +6306,8 @@ def render_qualified_table_dashboard(conn, database: str, schema: str, table: st
     _render_table_dashboard_body(df, key_suffix="other")
 
 
-def render_table_dashboard(conn, schema, table):
-    row_count = get_row_count(conn, schema, table)
+def render_table_dashboard(conn, schema, table, database=None):
+    row_count = get_row_count(conn, schema, table, database=database)
     st.markdown(
         f'<div class="console-header">'
         f'<h1>{schema}.{table}</h1>'
@@ -5728,9 +6324,10 @@ def render_table_dashboard(conn, schema, table):
 def _render_table_dashboard_body(df, key_suffix=""):
     """Shared body: charts and sample from a loaded DataFrame. key_suffix avoids duplicate widget keys when mixing current DB and Other DB views."""
     columns = list(df.columns)
-    date_cols = [c for c in columns if is_date_col(c) and pd.api.types.is_datetime64_any_dtype(df[c])]
+    date_cols = [c for c in columns if is_date_col(str(c)) and pd.api.types.is_datetime64_any_dtype(df[c])]
     numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
-    cat_candidates = [c for c in df.select_dtypes(include=["object"]).columns if not is_likely_id(c)]
+    id_like = {c for c in columns if is_likely_id(str(c))}
+    cat_candidates = [c for c in df.select_dtypes(include=["object", "string"]).columns if c not in id_like]
 
     st.markdown('<p class="section-title">📈 At a glance</p>', unsafe_allow_html=True)
     k1, k2, k3, k4 = st.columns(4)
@@ -5759,7 +6356,7 @@ def _render_table_dashboard_body(df, key_suffix=""):
         df_ts = df_ts.dropna(subset=[date_col])
         if not df_ts.empty:
             daily = df_ts.set_index(date_col).resample("D").size().reset_index(name="count")
-            fig = px.line(daily, x=date_col, y="count", title=f"Daily row count · {date_col}")
+            fig = px.line(daily, x=date_col, y="count", title=f"Daily row count · {date_col}", render_mode="webgl")
             fig.update_traces(line=dict(color=PALETTE["accent"], width=2.5))
             fig.update_layout(**chart_layout(340))
             st.plotly_chart(fig, use_container_width=True)
@@ -5978,7 +6575,7 @@ def main():
     use_database(conn, selected_db)
 
     bnpl_only = st.sidebar.checkbox("BNPL-related tables only", value=False)
-    tables = get_tables(conn, bnpl_only=bnpl_only)
+    tables = get_tables(conn, bnpl_only=bnpl_only, database=selected_db)
 
     if not tables:
         st.warning("No tables found in this database." + (" Try turning off 'BNPL-related only'." if bnpl_only else ""))
@@ -6084,7 +6681,7 @@ def main():
             st.warning("Invalid qualified table name.")
     else:
         schema, table = choice_plain.replace("Drill down: ", "").split(".", 1)
-        render_table_dashboard(conn, schema, table)
+        render_table_dashboard(conn, schema, table, database=selected_db)
 
 
 if __name__ == "__main__":
@@ -51,6 +51,8 @@ USE_SSO = SNOWFLAKE_AUTHENTICATOR == "externalbrowser"
 SNOWFLAKE_ACCOUNT_SSO = os.environ.get("SNOWFLAKE_ACCOUNT_SSO", "").strip()
 # Optional: if 250001 (can't reach Snowflake), try adding region (e.g. us-east-1, eu-central-1)
 SNOWFLAKE_REGION = os.environ.get("SNOWFLAKE_REGION", "").strip()
+# Threads the connector uses to download result chunks of large (Arrow) results in parallel (Snowflake allows 1-10)
+SNOWFLAKE_PREFETCH_THREADS = int(os.environ.get("SNOWFLAKE_PREFETCH_THREADS", "4") or 4)
 
 # Table and columns for funnel steps (change to match your DB)
 FUNNEL_TABLE = os.environ.get("FUNNEL_TABLE", "funnel_steps")  # or "schema.table"
@@ -108,6 +110,11 @@ def get_connection():
         warehouse=warehouse,
         database=database,
         schema=schema,
+        # The dashboard holds one connection for the whole process; keep the session (and MFA token) alive
+        client_session_keep_alive=True,
+        session_parameters={
+            "CLIENT_PREFETCH_THREADS": SNOWFLAKE_PREFETCH_THREADS,
+        },
     )
     if use_sso:
         connect_args["authenticator"] = "externalbrowser"
@@ -250,7 +257,9 @@ def list_tables(filter_name=None) -> None:
             """
             params = [SNOWFLAKE_DATABASE.strip()]
             if filter_name:
-                sql += " AND (UPPER(TABLE_SCHEMA) LIKE %s OR UPPER(TABLE_NAME) LIKE %s)"
+                # Unquoted identifiers are stored uppercase; ILIKE still catches quoted mixed-case names
+                # without wrapping every row's column in UPPER().
+                sql += " AND (TABLE_SCHEMA ILIKE %s OR TABLE_NAME ILIKE %s)"
                 pattern = f"%{filter_name.upper()}%"
                 params.extend([pattern, pattern])
             sql += " ORDER BY TABLE_SCHEMA, TABLE_NAME"
@@ -0,0 +1,49 @@
+"""_norm_upper: upper/strip per distinct value, with missing values left missing.
+
+dashboard.py is the Streamlit script (it renders the page on import), so the helpers are compiled out of its source.
+"""
+
+import ast
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _load(*names):
+    source = (Path(__file__).resolve().parent.parent / "dashboard.py").read_text(encoding="utf-8")
+    nodes = [n for n in ast.parse(source).body if isinstance(n, ast.FunctionDef) and n.name in names]
+    namespace = {"np": np, "pd": pd}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), "dashboard.py", "exec"), namespace)
+    return [namespace[name] for name in names]
+
+
+_norm_upper, _arrow_string_dtype = _load("_norm_upper", "_arrow_string_dtype")
+# The dtype _coerce_object_columns gives string columns loaded from Snowflake
+_ARROW_STRING = _arrow_string_dtype()
+
+needs_arrow_string = pytest.mark.skipif(_ARROW_STRING is None, reason="pandas/pyarrow without an Arrow string dtype")
+
+
+def test_upper_strips_each_value():
+    out = _norm_upper(pd.Series([" completed", "Failed ", "completed"], index=[10, 11, 12]))
+    assert out.tolist() == ["COMPLETED", "FAILED", "COMPLETED"]
+    assert out.index.tolist() == [10, 11, 12]
+
+
+@needs_arrow_string
+@pytest.mark.parametrize("missing", [None, np.nan])
+def test_missing_stays_missing(missing):
+    out = _norm_upper(pd.Series(["pending", missing, "successful"], dtype=_ARROW_STRING))
+    assert out.iloc[0] == "PENDING"
+    assert out.iloc[2] == "SUCCESSFUL"
+    assert pd.isna(out.iloc[1])
+    assert not out.eq("SUCCESSFUL").iloc[1]
+
+
+@needs_arrow_string
+def test_all_missing():
+    out = _norm_upper(pd.Series([None, None], dtype=_ARROW_STRING))
+    assert len(out) == 2
+    assert out.isna().all()